@@ -7,6 +7,7 @@ from api.schemas import (
 )
 from excel_loader_service import ExcelLoaderService
 from services.plant_service import PlantService
+from services.user_service_client import refresh_user_service_plants
 
 # Create router
 router = APIRouter(prefix="/api/excel", tags=["excel-loader"])
@@ -63,6 +64,10 @@ async def upload_excel_file(file: UploadFile = File(...)):
                 db_result = await plant_service.save_plants_batch_async(all_plants)
                 print(f"Database save completed: {db_result.get('saved', 0)} saved, {db_result.get('updated', 0)} updated")
                 
+                # Let the game pick up the new plants right away
+                if db_result.get('saved', 0) or db_result.get('updated', 0):
+                    await refresh_user_service_plants()
+                
                 # Add database save info to response
                 if db_result.get("success"):
                     message += f" | Saved {db_result.get('saved', 0)} new plants, updated {db_result.get('updated', 0)} existing plants"
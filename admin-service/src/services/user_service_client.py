@@ -0,0 +1,37 @@
+"""
+Client for the user service's admin endpoints.
+The user service caches plant data, so after saving plants the admin service asks it
+to drop its cache instead of waiting for the cache to expire.
+"""
+import os
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+async def refresh_user_service_plants() -> bool:
+    """
+    Ask the user service to reload its cached plant data.
+    Skipped unless USER_SERVICE_URL and ADMIN_API_TOKEN are set; failures are logged
+    and otherwise ignored, since the user service's cache also expires on its own.
+    
+    Returns:
+        True if the user service refreshed its cache, False otherwise
+    """
+    user_service_url = os.getenv("USER_SERVICE_URL")
+    token = os.getenv("ADMIN_API_TOKEN")
+    if not user_service_url or not token:
+        return False
+    
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.post(
+                f"{user_service_url.rstrip('/')}/api/game/refresh-plants",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            response.raise_for_status()
+        return True
+    except httpx.HTTPError as e:
+        print(f"Could not refresh the user service's plant cache: {str(e)}")
+        return False
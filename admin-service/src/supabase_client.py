@@ -5,6 +5,8 @@ Supports async operations using run_in_executor to avoid blocking the event loop
 """
 import os
 import asyncio
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Any
 from supabase import create_client, Client
 from supabase.client import ClientOptions
@@ -12,6 +14,29 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _create_http_client() -> httpx.Client:
+    """
+    Create the pooled HTTP client used for all Supabase requests.
+    Uses HTTP/2 when the h2 package is installed, and retries failed connection attempts.
+    Copy of _create_http_client in user-service/src/supabase_client.py (the services are
+    deployed separately and share no code); keep the two in sync.
+    """
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    
+    transport = httpx.HTTPTransport(
+        http2=http2,
+        retries=2,
+        # Sized above the database thread pool so queries don't wait for a connection;
+        # idle connections are kept for a minute so bursts of requests skip the handshake
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0),
+    )
+    return httpx.Client(transport=transport, timeout=httpx.Timeout(120.0, connect=10.0))
+
+
 # Initialize Supabase client
 def get_supabase_client() -> Client:
     """
@@ -31,10 +56,13 @@ def get_supabase_client() -> Client:
     if not supabase_key:
         raise ValueError("SUPABASE_PUBLISHABLE_KEY environment variable is not set")
     
-    # Configure client options to avoid auto-refresh and session persistence
+    # Configure client options to avoid auto-refresh and session persistence.
+    # All database and storage calls share one pooled keep-alive HTTP client so
+    # requests reuse connections instead of doing a new TCP+TLS handshake each time.
     client_options = ClientOptions(
         auto_refresh_token=False,
         persist_session=False,
+        httpx_client=_create_http_client(),
     )
     
     return create_client(supabase_url, supabase_key, options=client_options)
@@ -56,9 +84,17 @@ def get_client() -> Client:
     return _supabase_client
 
 
+# Database queries run on their own thread pool, so slow work on the default
+# executor (e.g. image classification) cannot hold up short I/O-bound queries
+_db_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DB_THREAD_POOL_SIZE", "32")),
+    thread_name_prefix="supabase-db"
+)
+
+
 async def async_execute(query_builder_callable: Callable[[], Any]) -> Any:
     """
-    Execute a Supabase query builder chain asynchronously in a thread pool.
+    Execute a Supabase query builder chain asynchronously in the database thread pool.
     
     This prevents blocking the event loop when making database operations.
     
@@ -78,8 +114,8 @@ async def async_execute(query_builder_callable: Callable[[], Any]) -> Any:
             lambda: client.table("users").select("*").eq("id", user_id)
         )
     """
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     def _execute_in_thread():
         return query_builder_callable().execute()
-    return await loop.run_in_executor(None, _execute_in_thread)
+    return await loop.run_in_executor(_db_executor, _execute_in_thread)
 
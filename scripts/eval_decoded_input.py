@@ -0,0 +1,132 @@
+"""
+Script to compare classifying submitted image bytes with classifying the decoded image.
+
+verify_and_upload_image decodes each image once (ImageService.decode_image, which also
+applies the EXIF orientation) and classifies the decoded image instead of the bytes.
+This script measures what that changes on the Wikipedia evaluation images:
+1. Reads the evaluation results from bioclip_wikipedia_eval.csv
+2. Loads each plant's image from data/wiki_images/
+3. Builds the classifier input from the bytes and from the decoded image and compares them
+4. With --classify, also runs BioCLIP on both inputs and compares top-1 species accuracy
+   (needs the BioCLIP weights and the Supabase plant list, like the user service)
+"""
+
+import csv
+import io
+import os
+import sys
+from pathlib import Path
+
+import torch
+from PIL import Image
+
+# Add user-service to path to import modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'user-service', 'src'))
+
+from game_utils.image_features import _preprocess_image
+from services.image_service import ImageService
+from upload_correct_wiki_images import build_image_index, find_image_file
+
+
+def _bioclip_preprocess():
+    """BioCLIP's eval preprocess (224 px, CLIP mean/std), built without loading the model."""
+    import open_clip
+    return open_clip.image_transform(224, is_train=False)
+
+
+def evaluate(eval_csv: str, wiki_images_dir: str, classify: bool = False):
+    """
+    Compare the bytes and decoded-image classifier inputs for every evaluation image.
+
+    Args:
+        eval_csv: Path to bioclip_wikipedia_eval.csv
+        wiki_images_dir: Directory with the Wikipedia images
+        classify: Also classify both inputs with BioCLIP and compare top-1 accuracy
+    """
+    with open(eval_csv, newline='', encoding='utf-8') as f:
+        rows = [row for row in csv.DictReader(f) if row['found_image'] == 'True']
+    image_index = build_image_index(Path(wiki_images_dir))
+    # decode_image needs no Supabase client
+    image_service = ImageService.__new__(ImageService)
+
+    if classify:
+        from plant_game import get_plant_classifier
+        classifier = get_plant_classifier()
+        preprocess = classifier.preprocess
+    else:
+        preprocess = _bioclip_preprocess()
+
+    stats = {'images': 0, 'reoriented': 0, 'changed': 0, 'max_diff': 0.0, 'min_cosine': 1.0}
+    correct = {'bytes': 0, 'decoded': 0}
+    disagreements = []
+
+    for row in rows:
+        image_file = find_image_file(row['plant_name'], image_index)
+        if image_file is None:
+            continue
+        image_bytes = image_file.read_bytes()
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            orientation = img.getexif().get(0x0112, 1)
+        decoded = image_service.decode_image(image_bytes)
+
+        stats['images'] += 1
+        stats['reoriented'] += orientation != 1
+
+        from_bytes = _preprocess_image(image_bytes, preprocess)
+        from_decoded = _preprocess_image(decoded, preprocess)
+        diff = (from_bytes - from_decoded).abs().max().item()
+        cosine = torch.nn.functional.cosine_similarity(from_bytes.double().flatten(), from_decoded.double().flatten(), dim=0).item()
+        stats['changed'] += diff > 0
+        stats['max_diff'] = max(stats['max_diff'], diff)
+        stats['min_cosine'] = min(stats['min_cosine'], cosine)
+
+        if classify:
+            by_bytes = classifier.classify_image(image_bytes).plant_name
+            by_decoded = classifier.classify_image(decoded).plant_name
+            correct['bytes'] += by_bytes == row['plant_name']
+            correct['decoded'] += by_decoded == row['plant_name']
+            if by_bytes != by_decoded:
+                disagreements.append((row['plant_name'], by_bytes, by_decoded))
+
+    # Print summary
+    print("\n" + "="*60)
+    print("DECODED INPUT EVALUATION")
+    print("="*60)
+    print(f"Images evaluated: {stats['images']}")
+    print(f"Rotated by EXIF orientation: {stats['reoriented']}")
+    print(f"Classifier input changed: {stats['changed']}")
+    print(f"Largest input difference (normalized units): {stats['max_diff']:.4f}")
+    print(f"Lowest input cosine similarity: {stats['min_cosine']:.6f}")
+
+    if classify and stats['images']:
+        print(f"\nTop-1 species accuracy from bytes: {correct['bytes'] / stats['images']:.2%}")
+        print(f"Top-1 species accuracy from decoded image: {correct['decoded'] / stats['images']:.2%}")
+        print(f"Top-1 disagreements: {len(disagreements)}")
+        for plant_name, by_bytes, by_decoded in disagreements[:10]:
+            print(f"  - {plant_name}: {by_bytes} (bytes) vs {by_decoded} (decoded)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compare classifying image bytes with classifying the decoded image"
+    )
+    parser.add_argument(
+        "--csv",
+        default="data/bioclip_wikipedia_eval.csv",
+        help="Path to evaluation CSV file (default: data/bioclip_wikipedia_eval.csv)"
+    )
+    parser.add_argument(
+        "--images-dir",
+        default="data/wiki_images",
+        help="Directory containing Wikipedia images (default: data/wiki_images)"
+    )
+    parser.add_argument(
+        "--classify",
+        action="store_true",
+        help="Also classify both inputs with BioCLIP and compare top-1 accuracy"
+    )
+
+    args = parser.parse_args()
+    evaluate(args.csv, args.images_dir, classify=args.classify)
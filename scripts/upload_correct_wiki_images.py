@@ -7,13 +7,22 @@ This script:
 3. Loads the corresponding images from data/wiki_images/
 4. Uploads them to the database using the same flow as the user service
 5. Optionally performs health assessment on each image
+
+Health assessment and upload run as two concurrent stages connected by a
+bounded queue, so one image is being uploaded while the next is assessed.
 """
 
 import os
+import re
 import sys
-import pandas as pd
+import asyncio
+import bisect
+import random
 import time
+import pyarrow.csv as pacsv
+import pyarrow.compute as pc
 from pathlib import Path
+from typing import Callable, Dict, List
 
 # Add user-service to path to import modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'user-service', 'src'))
@@ -22,38 +31,73 @@ from game_utils.supabase_handler import SupabaseHandler
 from game_utils.plant_health_assesor import get_plant_health_assessor  # Note: filename has typo "assesor"
 
 
+# Columns of bioclip_wikipedia_eval.csv used by this script
+EVAL_COLUMNS = ['plant_name', 'Dome', 'top_1_conf', 'top1_species_match', 'found_image']
+
+# Anything that is not a word character, space or hyphen becomes "_" in a slug
+_SLUG_RE = re.compile(r"[^\w \-]")
+
+
 def slugify_name(name: str) -> str:
     """Convert plant name to filename slug (matches notebook logic)."""
-    return ''.join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in name).replace(' ', '_')[:200]
+    return _SLUG_RE.sub('_', name).replace(' ', '_')[:200]
+
+
+def build_image_index(wiki_images_dir: Path) -> Dict:
+    """
+    Scan the wiki images directory once and index file stems by each normalization
+    find_image_file uses, so lookups are dict hits instead of per-plant directory globs.
+    
+    Returns:
+        Dictionary of lookup tables used by find_image_file
+    """
+    files = sorted(wiki_images_dir.glob("*.jpg"))
+    index = {
+        "by_stem": {},
+        "by_lower": {},
+        "by_squashed": {},
+        "names": [f.name for f in files],
+        "files": files
+    }
+    for img_file in files:
+        stem = img_file.stem
+        index["by_stem"][stem] = img_file
+        # First file wins for the lossy normalizations
+        index["by_lower"].setdefault(stem.lower(), img_file)
+        index["by_squashed"].setdefault(stem.replace('_', '').lower(), img_file)
+    return index
 
 
-def find_image_file(plant_name: str, wiki_images_dir: Path) -> Path:
+def find_image_file(plant_name: str, image_index: Dict) -> Path:
     """
     Find the image file for a plant name.
     Tries exact slug match first, then partial matches.
     """
     slug = slugify_name(plant_name)
-    exact_path = wiki_images_dir / f"{slug}.jpg"
     
-    if exact_path.exists():
-        return exact_path
+    if slug in image_index["by_stem"]:
+        return image_index["by_stem"][slug]
     
     # Try case-insensitive match
-    for img_file in wiki_images_dir.glob("*.jpg"):
-        if img_file.stem.lower() == slug.lower():
-            return img_file
+    if slug.lower() in image_index["by_lower"]:
+        return image_index["by_lower"][slug.lower()]
     
     # Try matching first two words (genus + species)
     words = plant_name.split()
     if len(words) >= 2:
         two_word_slug = slugify_name(f"{words[0]} {words[1]}")
-        two_word_path = wiki_images_dir / f"{two_word_slug}.jpg"
-        if two_word_path.exists():
-            return two_word_path
+        if two_word_slug in image_index["by_stem"]:
+            return image_index["by_stem"][two_word_slug]
     
-    # Try partial match (first word matches)
+    # Try partial match (first word matches); names are sorted so matches are contiguous
     first_word = words[0] if words else plant_name
-    matches = list(wiki_images_dir.glob(f"{first_word}_*.jpg"))
+    prefix = f"{first_word}_"
+    names = image_index["names"]
+    start = bisect.bisect_left(names, prefix)
+    end = start
+    while end < len(names) and names[end].startswith(prefix):
+        end += 1
+    matches = image_index["files"][start:end]
     if matches:
         # Prefer exact match on first two words if available
         if len(words) >= 2:
@@ -64,19 +108,198 @@ def find_image_file(plant_name: str, wiki_images_dir: Path) -> Path:
         return matches[0]
     
     # Try without underscores
-    slug_no_underscore = slug.replace('_', '')
-    for img_file in wiki_images_dir.glob("*.jpg"):
-        if img_file.stem.replace('_', '').lower() == slug_no_underscore.lower():
-            return img_file
-    
-    return None
+    return image_index["by_squashed"].get(slug.replace('_', '').lower())
+
+
+def _prepare_row(position: int, total: int, row, image_index: Dict, health_assessor, dry_run: bool) -> Dict:
+    """
+    Stage A of the upload pipeline: locate, read and (optionally) health-assess one image.
+
+    Returns:
+        Dictionary with a "status" of "ready", "uploaded" (dry run), "skipped" or "failed"
+    """
+    plant_name = row['plant_name']
+    dome = row['Dome']
+    confidence = row['top_1_conf']
+    prefix = f"[{position}/{total}]"
+
+    print(f"\n{prefix} Processing: {plant_name} ({dome})")
+    print(f"{prefix}   Confidence: {confidence:.2%}")
+
+    # Find the image file
+    img_path = find_image_file(plant_name, image_index)
+    if not img_path:
+        print(f"{prefix}   ⚠️  Image file not found for {plant_name}")
+        return {"status": "skipped", "error": f"{plant_name}: Image file not found"}
+
+    print(f"{prefix}   📷 Found image: {img_path.name}")
+
+    if dry_run:
+        print(f"{prefix}   [DRY RUN] Would upload {plant_name} from {img_path}")
+        return {"status": "uploaded"}
+
+    # Read image bytes
+    try:
+        with open(img_path, 'rb') as f:
+            image_bytes = f.read()
+    except Exception as e:
+        print(f"{prefix}   ❌ Error reading image file: {e}")
+        return {"status": "failed", "error": f"{plant_name}: Error reading image - {str(e)}"}
+
+    # Perform health assessment if requested
+    health_assessment = None
+    if health_assessor:
+        try:
+            print(f"{prefix}   🔍 Assessing plant health...")
+            health_assessment = health_assessor.assess_plant_health(
+                image=image_bytes,
+                plant_name=plant_name,
+                location=dome
+            )
+            if health_assessment.success:
+                print(f"{prefix}   ✅ Health: {health_assessment.overall_status} (score: {health_assessment.health_score}/100)")
+            else:
+                print(f"{prefix}   ⚠️  Health assessment failed: {health_assessment.error}")
+        except Exception as e:
+            print(f"{prefix}   ⚠️  Error during health assessment: {e}")
+            health_assessment = None
+
+    return {
+        "status": "ready",
+        "prefix": prefix,
+        "plant_name": plant_name,
+        "dome": dome,
+        "image_bytes": image_bytes,
+        "health_assessment": health_assessment.to_dict() if health_assessment else None
+    }
+
+
+def _call_with_retry(
+    func: Callable[[], Dict],
+    is_transient_failure: Callable[[Dict], bool],
+    max_attempts: int = 6,
+    initial_delay: float = 0.5,
+    max_delay: float = 30.0
+) -> Dict:
+    """
+    Call func, retrying with exponential backoff and full jitter.
+    This is the only retry layer for uploads; the storage retries in ImageService are disabled.
+
+    Exceptions and results flagged by is_transient_failure are retried; anything
+    else is returned immediately. The last exception is re-raised once attempts run out.
+    """
+    for attempt in range(max_attempts):
+        try:
+            result = func()
+            if not is_transient_failure(result) or attempt == max_attempts - 1:
+                return result
+        except Exception:
+            if attempt == max_attempts - 1:
+                raise
+        time.sleep(random.uniform(0, min(max_delay, initial_delay * 2 ** attempt)))
+
+
+def _is_transient_upload_failure(upload_result: Dict) -> bool:
+    """Storage/database errors surface as "Error uploading image: ..."; a missing plant is permanent."""
+    return not upload_result.get("success") and str(upload_result.get("error", "")).startswith("Error uploading image")
+
+
+def _upload_row(item: Dict, supabase_handler: SupabaseHandler) -> Dict:
+    """
+    Stage B of the upload pipeline: upload one prepared image to the database.
+
+    Returns:
+        Dictionary with a "status" of "uploaded" or "failed"
+    """
+    prefix = item["prefix"]
+    plant_name = item["plant_name"]
+    try:
+        print(f"{prefix}   📤 Uploading {plant_name} to database...")
+        upload_result = _call_with_retry(
+            lambda: supabase_handler.upload_user_plant_image(
+                scientific_name=plant_name,
+                dome=item["dome"],
+                image=item["image_bytes"],
+                health_assessment=item["health_assessment"]
+            ),
+            _is_transient_upload_failure
+        )
+
+        if upload_result.get("success"):
+            print(f"{prefix}   ✅ Upload successful! Image URL: {upload_result.get('image_url', 'N/A')}")
+            return {"status": "uploaded"}
+
+        error_msg = upload_result.get('error', 'Unknown error')
+        print(f"{prefix}   ❌ Upload failed: {error_msg}")
+        return {"status": "failed", "error": f"{plant_name}: Upload failed - {error_msg}"}
+    except Exception as e:
+        print(f"{prefix}   ❌ Exception during upload: {e}")
+        return {"status": "failed", "error": f"{plant_name}: Exception - {str(e)}"}
+
+
+async def _run_upload_pipeline(
+    rows: List,
+    image_index: Dict,
+    supabase_handler: SupabaseHandler,
+    health_assessor,
+    dry_run: bool,
+    stats: Dict,
+    assess_workers: int,
+    upload_workers: int
+):
+    """
+    Run health assessment and upload as two bounded stages connected by a queue,
+    so database latency overlaps with model inference instead of adding to it.
+    """
+    total = len(rows)
+    row_queue = asyncio.Queue()
+    for position, row in enumerate(rows, start=1):
+        row_queue.put_nowait((position, row))
+    upload_queue = asyncio.Queue(maxsize=32)
+
+    def record(outcome: Dict):
+        stats[outcome["status"]] += 1
+        if outcome.get("error"):
+            stats['errors'].append(outcome["error"])
+
+    async def assess_worker():
+        while True:
+            try:
+                position, row = row_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            outcome = await asyncio.to_thread(
+                _prepare_row, position, total, row, image_index, health_assessor, dry_run
+            )
+            if outcome["status"] == "ready":
+                await upload_queue.put(outcome)
+            else:
+                record(outcome)
+
+    async def upload_worker():
+        while True:
+            item = await upload_queue.get()
+            if item is None:
+                return
+            record(await asyncio.to_thread(_upload_row, item, supabase_handler))
+
+    producers = [asyncio.create_task(assess_worker()) for _ in range(assess_workers)]
+    consumers = [asyncio.create_task(upload_worker()) for _ in range(upload_workers)]
+
+    # Once every row has been assessed, send one sentinel per consumer
+    await asyncio.gather(*producers)
+    for _ in consumers:
+        await upload_queue.put(None)
+    await asyncio.gather(*consumers)
 
 
 def upload_correct_images(
     csv_path: str = "data/bioclip_wikipedia_eval.csv",
     wiki_images_dir: str = "data/wiki_images",
     assess_health: bool = True,
-    dry_run: bool = False
+    dry_run: bool = False,
+    assess_workers: int = 2,
+    upload_workers: int = 4
 ):
     """
     Upload correctly identified Wikipedia images to the database.
@@ -86,16 +309,22 @@ def upload_correct_images(
         wiki_images_dir: Directory containing downloaded Wikipedia images
         assess_health: Whether to perform health assessment on images
         dry_run: If True, only print what would be uploaded without actually uploading
+        assess_workers: Number of concurrent image read + health assessment workers
+        upload_workers: Number of concurrent database upload workers
     """
-    # Read the evaluation CSV
+    # Read only the columns we need from the evaluation CSV
     print(f"Reading evaluation results from {csv_path}...")
-    df = pd.read_csv(csv_path)
+    table = pacsv.read_csv(
+        csv_path,
+        convert_options=pacsv.ConvertOptions(include_columns=EVAL_COLUMNS)
+    )
     
     # Filter for correctly identified plants with images
-    correct_matches = df[
-        (df['top1_species_match'] == True) & 
-        (df['found_image'] == True)
-    ].copy()
+    mask = pc.and_(
+        pc.equal(table['top1_species_match'], True),
+        pc.equal(table['found_image'], True)
+    )
+    correct_matches = table.filter(mask).to_pylist()
     
     print(f"Found {len(correct_matches)} correctly identified plants with images")
     
@@ -105,6 +334,9 @@ def upload_correct_images(
     
     # Initialize services
     supabase_handler = SupabaseHandler()
+    # _upload_row retries whole uploads (storage write and database insert), so the
+    # storage layer's own retries are turned off to keep retrying in one place
+    supabase_handler.image_service.UPLOAD_RETRIES = 0
     health_assessor = get_plant_health_assessor() if assess_health else None
     
     wiki_images_path = Path(wiki_images_dir)
@@ -121,83 +353,17 @@ def upload_correct_images(
         'errors': []
     }
     
-    # Process each correct match
-    for idx, row in correct_matches.iterrows():
-        plant_name = row['plant_name']
-        dome = row['Dome']
-        confidence = row['top_1_conf']
-        
-        print(f"\n[{stats['uploaded'] + stats['failed'] + stats['skipped'] + 1}/{stats['total']}] Processing: {plant_name} ({dome})")
-        print(f"  Confidence: {confidence:.2%}")
-        
-        # Find the image file
-        img_path = find_image_file(plant_name, wiki_images_path)
-        if not img_path:
-            print(f"  ⚠️  Image file not found for {plant_name}")
-            stats['skipped'] += 1
-            stats['errors'].append(f"{plant_name}: Image file not found")
-            continue
-        
-        print(f"  📷 Found image: {img_path.name}")
-        
-        if dry_run:
-            print(f"  [DRY RUN] Would upload {plant_name} from {img_path}")
-            stats['uploaded'] += 1
-            continue
-        
-        # Read image bytes
-        try:
-            with open(img_path, 'rb') as f:
-                image_bytes = f.read()
-        except Exception as e:
-            print(f"  ❌ Error reading image file: {e}")
-            stats['failed'] += 1
-            stats['errors'].append(f"{plant_name}: Error reading image - {str(e)}")
-            continue
-        
-        # Perform health assessment if requested
-        health_assessment = None
-        if assess_health and health_assessor:
-            try:
-                print(f"  🔍 Assessing plant health...")
-                health_assessment = health_assessor.assess_plant_health(
-                    image=image_bytes,
-                    plant_name=plant_name,
-                    location=dome
-                )
-                if health_assessment.get("success"):
-                    print(f"  ✅ Health: {health_assessment.get('overall_status')} (score: {health_assessment.get('health_score')}/100)")
-                else:
-                    print(f"  ⚠️  Health assessment failed: {health_assessment.get('error', 'Unknown error')}")
-            except Exception as e:
-                print(f"  ⚠️  Error during health assessment: {e}")
-                health_assessment = None
-        
-        # Upload to database
-        try:
-            print(f"  📤 Uploading to database...")
-            upload_result = supabase_handler.upload_user_plant_image(
-                scientific_name=plant_name,
-                dome=dome,
-                image=image_bytes,
-                health_assessment=health_assessment
-            )
-            
-            if upload_result.get("success"):
-                print(f"  ✅ Upload successful! Image URL: {upload_result.get('image_url', 'N/A')}")
-                stats['uploaded'] += 1
-            else:
-                error_msg = upload_result.get('error', 'Unknown error')
-                print(f"  ❌ Upload failed: {error_msg}")
-                stats['failed'] += 1
-                stats['errors'].append(f"{plant_name}: Upload failed - {error_msg}")
-        except Exception as e:
-            print(f"  ❌ Exception during upload: {e}")
-            stats['failed'] += 1
-            stats['errors'].append(f"{plant_name}: Exception - {str(e)}")
-        
-        # Polite delay between uploads
-        time.sleep(0.5)
+    # Process each correct match through the assess -> upload pipeline
+    asyncio.run(_run_upload_pipeline(
+        correct_matches,
+        build_image_index(wiki_images_path),
+        supabase_handler,
+        health_assessor,
+        dry_run,
+        stats,
+        assess_workers=max(1, assess_workers),
+        upload_workers=max(1, upload_workers)
+    ))
     
     # Print summary
     print("\n" + "="*60)
@@ -242,6 +408,18 @@ if __name__ == "__main__":
         action="store_true",
         help="Dry run mode: show what would be uploaded without actually uploading"
     )
+    parser.add_argument(
+        "--assess-workers",
+        type=int,
+        default=2,
+        help="Number of concurrent health assessment workers (default: 2)"
+    )
+    parser.add_argument(
+        "--upload-workers",
+        type=int,
+        default=4,
+        help="Number of concurrent upload workers (default: 4)"
+    )
     
     args = parser.parse_args()
     
@@ -249,6 +427,8 @@ if __name__ == "__main__":
         csv_path=args.csv,
         wiki_images_dir=args.images_dir,
         assess_health=not args.no_health,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        assess_workers=args.assess_workers,
+        upload_workers=args.upload_workers
     )
 
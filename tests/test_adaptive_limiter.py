@@ -0,0 +1,50 @@
+import asyncio
+import os
+import sys
+import unittest
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+from game_utils.adaptive_limiter import AdaptiveLimiter
+
+
+class AdaptiveLimiterTest(unittest.TestCase):
+
+    def test_cancel_during_retry_after_pause_releases_slot(self):
+        async def scenario():
+            limiter = AdaptiveLimiter(max_limit=2)
+            async with limiter:
+                limiter.update(httpx.Response(429, headers={"retry-after": "30"}))
+
+            async def call():
+                async with limiter:
+                    pass
+
+            task = asyncio.create_task(call())
+            await asyncio.sleep(0.05)  # the task now holds a slot and sleeps in the pause
+            self.assertEqual(limiter._in_flight, 1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return limiter
+
+        limiter = asyncio.run(scenario())
+        self.assertEqual(limiter._in_flight, 0)
+
+    def test_429_halves_limit_and_success_grows_it(self):
+        async def scenario():
+            limiter = AdaptiveLimiter(max_limit=8)
+            async with limiter:
+                limiter.update(httpx.Response(429))
+            self.assertEqual(limiter.limit, 4)
+            async with limiter:
+                limiter.update(httpx.Response(200, headers={"x-ratelimit-remaining-requests": "100"}))
+            self.assertEqual(limiter.limit, 5)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import sys
+import unittest
+from unittest import mock
+
+import httpx
+from storage3.exceptions import StorageApiError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+from services.image_service import ImageService
+
+
+class UploadImageFileTest(unittest.TestCase):
+
+    IMAGE = b"\xff\xd8 small jpeg bytes"
+
+    def setUp(self):
+        # No Supabase client: the storage bucket and table queries are mocks
+        self.service = ImageService.__new__(ImageService)
+        self.service.client = mock.MagicMock()
+        self.service.table = "user_plant_images"
+        self.service.storage_bucket = "plant-images"
+        self.bucket = self.service.client.storage.from_.return_value
+        self.bucket.get_public_url.side_effect = lambda path: f"https://cdn.example/{path}"
+        self.saved_rows = []
+        self.service.client.table.return_value.select.return_value.eq.return_value.eq.return_value \
+            .limit.return_value.execute.side_effect = lambda: mock.Mock(data=self.saved_rows)
+        patcher = mock.patch("services.image_service.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _upload(self):
+        return self.service.upload_image_file("plant-1", self.IMAGE, compressed=True)
+
+    def test_file_is_named_by_content_hash(self):
+        path = self._upload()
+
+        digest = hashlib.blake2b(self.IMAGE, digest_size=16).hexdigest()
+        self.assertEqual(path, f"plant-1/{digest}.jpg")
+        self.assertEqual(self._upload(), path)
+        self.assertEqual(self.bucket.upload.call_count, 2)
+
+    def test_upload_is_skipped_when_a_saved_image_uses_the_file(self):
+        self.saved_rows = [{"id": "image-1"}]
+
+        path = self._upload()
+
+        self.bucket.upload.assert_not_called()
+        self.bucket.get_public_url.assert_called_once_with(path)
+
+    def test_conflict_means_the_file_is_already_stored(self):
+        self.bucket.upload.side_effect = StorageApiError("The resource already exists", "Duplicate", 409)
+
+        path = self._upload()
+
+        self.assertTrue(path.startswith("plant-1/"))
+        self.assertEqual(self.bucket.upload.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_transient_failures_are_retried(self):
+        self.bucket.upload.side_effect = [
+            StorageApiError("Service unavailable", "Error", 503),
+            httpx.ConnectError("connection reset"),
+            None,
+        ]
+
+        self._upload()
+
+        self.assertEqual(self.bucket.upload.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_client_errors_are_not_retried(self):
+        self.bucket.upload.side_effect = StorageApiError("Invalid key", "InvalidKey", 400)
+
+        with self.assertRaises(StorageApiError):
+            self._upload()
+        self.assertEqual(self.bucket.upload.call_count, 1)
+
+    def test_retries_are_bounded(self):
+        self.bucket.upload.side_effect = StorageApiError("Service unavailable", "Error", 503)
+
+        with self.assertRaises(StorageApiError):
+            self._upload()
+        self.assertEqual(self.bucket.upload.call_count, ImageService.UPLOAD_RETRIES + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+from game_utils.micro_batcher import MicroBatcher
+
+
+class MicroBatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = []
+
+    def double(self, items):
+        self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+    def test_concurrent_calls_share_batches(self):
+        batcher = MicroBatcher(self.double, max_batch_size=4, max_wait_ms=200)
+
+        futures = [batcher.submit(i) for i in range(10)]
+
+        self.assertEqual([future.result(timeout=5) for future in futures], [i * 2 for i in range(10)])
+        self.assertEqual([len(batch) for batch in self.batches], [4, 4, 2])
+        self.assertEqual([item for batch in self.batches for item in batch], list(range(10)))
+
+    def test_single_call_is_dispatched_after_max_wait(self):
+        batcher = MicroBatcher(self.double, max_batch_size=16, max_wait_ms=20)
+
+        started = time.monotonic()
+        self.assertEqual(batcher(21), 42)
+        elapsed = time.monotonic() - started
+
+        self.assertGreaterEqual(elapsed, 0.015)
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(self.batches, [[21]])
+
+    def test_blocking_calls_from_threads(self):
+        batcher = MicroBatcher(self.double, max_batch_size=8, max_wait_ms=50)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(batcher, range(8)))
+
+        self.assertEqual(results, [i * 2 for i in range(8)])
+        self.assertLess(len(self.batches), 8)
+
+    def test_batch_exception_is_raised_to_every_caller(self):
+        def fail(items):
+            raise RuntimeError("model failed")
+
+        batcher = MicroBatcher(fail, max_batch_size=4, max_wait_ms=50)
+        futures = [batcher.submit(i) for i in range(3)]
+
+        for future in futures:
+            with self.assertRaisesRegex(RuntimeError, "model failed"):
+                future.result(timeout=5)
+
+    def test_exception_result_is_raised_to_its_caller_only(self):
+        def decode(items):
+            return [ValueError(f"bad item {item}") if item < 0 else item for item in items]
+
+        batcher = MicroBatcher(decode, max_batch_size=4, max_wait_ms=50)
+        good, bad = batcher.submit(1), batcher.submit(-1)
+
+        self.assertEqual(good.result(timeout=5), 1)
+        with self.assertRaisesRegex(ValueError, "bad item -1"):
+            bad.result(timeout=5)
+
+    def test_worker_survives_a_failed_batch(self):
+        calls = threading.Event()
+
+        def flaky(items):
+            if not calls.is_set():
+                calls.set()
+                raise RuntimeError("first batch fails")
+            return items
+
+        batcher = MicroBatcher(flaky, max_batch_size=1, max_wait_ms=0)
+
+        with self.assertRaises(RuntimeError):
+            batcher(1)
+        self.assertEqual(batcher(2), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
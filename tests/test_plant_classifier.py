@@ -0,0 +1,134 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+from game_utils.plant_classifier import PlantClassifier
+
+
+class RankTestCase(unittest.TestCase):
+    """Sets up PlantClassifier's class-level caches with random plant features (no model)."""
+
+    NUM_PLANTS = 300
+    DIM = 64
+
+    def setUp(self):
+        self._saved = {
+            name: getattr(PlantClassifier, name)
+            for name in ("_scientific_names_cache", "_text_features_cache_T", "_text_features_int8_T",
+                         "_text_features_scale", "_faiss_index")
+        }
+        generator = torch.Generator().manual_seed(0)
+        text_features = torch.randn(self.NUM_PLANTS, self.DIM, generator=generator)
+        self.text_features = text_features / text_features.norm(dim=-1, keepdim=True)
+
+        PlantClassifier._scientific_names_cache = [f"Plant {i}" for i in range(self.NUM_PLANTS)]
+        PlantClassifier._text_features_cache_T = self.text_features.t().contiguous()
+        PlantClassifier._text_features_int8_T = None
+        PlantClassifier._text_features_scale = None
+        PlantClassifier._faiss_index = None
+        self.classifier = PlantClassifier.__new__(PlantClassifier)
+
+        # Images close to known plants: plant i's text features plus noise
+        self.targets = [3, 42, 150, 299]
+        noise = 0.05 * torch.randn(len(self.targets), self.DIM, generator=generator)
+        image_features = self.text_features[self.targets] + noise
+        self.image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+
+    def tearDown(self):
+        for name, value in self._saved.items():
+            setattr(PlantClassifier, name, value)
+
+    def enable_int8(self):
+        PlantClassifier._text_features_int8_T, PlantClassifier._text_features_scale = \
+            PlantClassifier._quantize_text_features(self.text_features)
+
+
+class Int8SimilarityTest(RankTestCase):
+
+    def test_int8_and_dense_rank_agree(self):
+        dense = self.classifier._rank(self.image_features)
+        self.enable_int8()
+        int8 = self.classifier._rank(self.image_features)
+
+        # Still set, i.e. the INT8 path ran instead of falling back
+        self.assertIsNotNone(PlantClassifier._text_features_int8_T)
+        self.assertEqual(len(dense), len(int8))
+        for target, dense_result, int8_result in zip(self.targets, dense, int8):
+            self.assertEqual(dense_result.plant_name, f"Plant {target}")
+            self.assertEqual(int8_result.plant_name, dense_result.plant_name)
+            self.assertAlmostEqual(int8_result.confidence, dense_result.confidence, delta=0.02)
+            self.assertEqual(int8_result.top_5[0][0], dense_result.top_5[0][0])
+
+    def test_int8_failure_falls_back_to_dense(self):
+        dense = self.classifier._rank(self.image_features)
+        self.enable_int8()
+
+        with mock.patch.object(torch, "_int_mm", side_effect=RuntimeError("unsupported shape")), \
+                self.assertLogs("game_utils.plant_classifier", level="WARNING"):
+            fallback = self.classifier._rank(self.image_features)
+
+        self.assertEqual([r.plant_name for r in fallback], [r.plant_name for r in dense])
+        self.assertIsNone(PlantClassifier._text_features_int8_T)
+
+
+class RankTest(RankTestCase):
+
+    def test_rank_orders_top_5_by_confidence(self):
+        results = self.classifier._rank(self.image_features)
+
+        for target, result in zip(self.targets, results):
+            self.assertTrue(result.success)
+            self.assertEqual(result.plant_name, f"Plant {target}")
+            self.assertEqual(len(result.top_5), 5)
+            self.assertEqual(result.top_5[0], (result.plant_name, result.confidence))
+            confidences = [confidence for _, confidence in result.top_5]
+            self.assertEqual(confidences, sorted(confidences, reverse=True))
+
+
+class ClassifyImagesTest(RankTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.classifier.model = self.classifier.preprocess = self.classifier.device = None
+
+    def _classify(self, features):
+        with mock.patch("game_utils.plant_classifier.encode_images", return_value=features) as encode:
+            results = self.classifier.classify_images([b"image"] * len(features))
+        encode.assert_called_once()
+        return results
+
+    def test_results_keep_image_order_and_failed_images(self):
+        features = [self.image_features[0:1], None, self.image_features[2:3]]
+
+        results = self._classify(features)
+
+        self.assertEqual([r.success for r in results], [True, False, True])
+        self.assertEqual(results[0].plant_name, f"Plant {self.targets[0]}")
+        self.assertIsNone(results[1].plant_name)
+        self.assertEqual(results[2].plant_name, f"Plant {self.targets[2]}")
+
+    def test_batch_matches_single_image_ranking(self):
+        features = [self.image_features[i:i + 1] for i in range(len(self.targets))]
+
+        batched = self._classify(features)
+
+        for image_features, result in zip(features, batched):
+            single = self.classifier._rank(image_features)[0]
+            self.assertEqual(result.plant_name, single.plant_name)
+            self.assertAlmostEqual(result.confidence, single.confidence, places=5)
+
+    def test_encoder_failure_fails_every_image(self):
+        with mock.patch("game_utils.plant_classifier.encode_images", side_effect=RuntimeError("out of memory")), \
+                self.assertLogs("game_utils.plant_classifier", level="ERROR"):
+            results = self.classifier.classify_images([b"a", b"b"])
+
+        self.assertEqual([r.success for r in results], [False, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+import plant_game
+from plant_game import PlantGame
+
+
+class FakeHandler:
+    """Supabase handler stand-in; uploading is a test failure."""
+
+    def decode_plant_image(self, image):
+        return None
+
+    def get_plant_id_by_scientific_name_and_dome(self, scientific_name, dome):
+        return "plant-id"
+
+    def compress_plant_image(self, image, decoded=None):
+        return image
+
+    def upload_plant_image_file(self, plant_id, image, compressed=False):
+        raise AssertionError("image should not be uploaded")
+
+    def save_user_plant_image(self, plant_id, path, health_assessment=None):
+        raise AssertionError("image should not be saved")
+
+
+class FakeClassifier:
+    """Classifier stand-in returning a fixed classification."""
+
+    min_confidence = 0.25
+
+    def __init__(self, plant_name, confidence):
+        self.result = SimpleNamespace(success=True, plant_name=plant_name, confidence=confidence, top_5=[])
+
+    def encode_image(self, image):
+        return None
+
+    def classify_image(self, image, image_features=None):
+        return self.result
+
+
+class VerifyAndUploadImageTest(unittest.TestCase):
+
+    def _verify(self, classifier):
+        with mock.patch.object(plant_game, "get_supabase_handler", FakeHandler), \
+                mock.patch.object(plant_game, "get_plant_summarizer", lambda: None), \
+                mock.patch.object(plant_game, "get_plant_classifier", lambda: classifier):
+            game = PlantGame("Tropical Dome", "Crinum asiaticum")
+            return asyncio.run(game.verify_and_upload_image(b"image"))
+
+    def test_below_confidence_floor_is_rejected_as_unclear(self):
+        result = self._verify(FakeClassifier("Crinum asiaticum", 0.2))
+
+        self.assertFalse(result["success"])
+        self.assertIn("enough confidence", result["message"])
+        self.assertNotIn("looking for", result["message"])
+        self.assertEqual(result["classified_plant"], "Crinum asiaticum")
+        self.assertEqual(result["confidence"], 0.2)
+        self.assertEqual(result["target_plant"], "Crinum asiaticum")
+
+    def test_floor_follows_the_classifier(self):
+        classifier = FakeClassifier("Crinum asiaticum", 0.4)
+        classifier.min_confidence = 0.5
+
+        result = self._verify(classifier)
+
+        self.assertFalse(result["success"])
+        self.assertIn("enough confidence", result["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+from game_utils.plant_summarizer import PlantSummarizer
+
+
+class FollowUpQuestionsTest(unittest.TestCase):
+
+    def setUp(self):
+        # No API clients; searches and chat requests are replaced below
+        self.summarizer = PlantSummarizer.__new__(PlantSummarizer)
+        self.requests = []
+
+        async def search(query):
+            return {"results": [{"content": f"About {query}."}]}
+
+        self.summarizer._search = search
+
+    def _answer(self, questions, batched_response):
+        async def post_chat(payload):
+            self.requests.append(payload)
+            if "response_format" in payload:
+                return batched_response
+            return f"single answer {len(self.requests)}"
+
+        self.summarizer._post_chat = post_chat
+        return asyncio.run(self.summarizer._answer_follow_up_questions("Crinum asiaticum", questions, "gpt-4o-mini", 100))
+
+    def test_batched_json_answers(self):
+        answers = self._answer(["q1", "q2"], '{"answers": ["a1", "a2"]}')
+
+        self.assertEqual(answers, ["a1", "a2"])
+        self.assertEqual(len(self.requests), 1)
+
+    def test_unparseable_json_falls_back_to_one_request_per_question(self):
+        with self.assertLogs("game_utils.plant_summarizer", level="WARNING"):
+            answers = self._answer(["q1", "q2"], "not json")
+
+        self.assertEqual(len(answers), 2)
+        self.assertTrue(all(answer.startswith("single answer") for answer in answers))
+        self.assertEqual(len(self.requests), 3)
+
+    def test_wrong_answer_count_falls_back(self):
+        with self.assertLogs("game_utils.plant_summarizer", level="WARNING"):
+            answers = self._answer(["q1", "q2"], '{"answers": ["a1"]}')
+
+        self.assertEqual(len(answers), 2)
+        self.assertEqual(len(self.requests), 3)
+
+
+class ExtractContextTest(unittest.TestCase):
+
+    def setUp(self):
+        self.summarizer = PlantSummarizer.__new__(PlantSummarizer)
+
+    def test_long_results_are_truncated(self):
+        content = "x" * (PlantSummarizer.MAX_RESULT_CHARS + 500)
+
+        context = self.summarizer._extract_context({"results": [{"title": "Ficus", "content": content}]})
+
+        self.assertEqual(context, "Ficus: " + "x" * PlantSummarizer.MAX_RESULT_CHARS)
+
+    def test_empty_and_duplicate_results_are_dropped(self):
+        opening = "Ficus lyrata is a species of flowering plant in the mulberry family. " * 4
+        results = [
+            {"title": "A", "content": opening + "From the first page."},
+            {"title": "B", "content": "   "},
+            {"title": "C", "content": opening + "From a mirror of the first page."},
+            {"title": "", "content": "Native to western Africa."},
+        ]
+
+        context = self.summarizer._extract_context({"results": results})
+
+        self.assertIn("A: ", context)
+        self.assertNotIn("B: ", context)
+        self.assertNotIn("C: ", context)
+        self.assertIn("Native to western Africa.", context)
+
+    def test_results_stop_at_the_token_budget(self):
+        results = [{"title": str(i), "content": f"{i} " + "word " * 200} for i in range(50)]
+
+        with mock.patch.object(PlantSummarizer, "MAX_CONTEXT_TOKENS", 1000):
+            context = self.summarizer._extract_context({"results": results})
+
+        included = [result for result in results if f"{result['title']}: " in context]
+        self.assertGreater(len(included), 0)
+        self.assertLess(len(included), len(results))
+        self.assertEqual(included, results[:len(included)])
+
+
+if __name__ == "__main__":
+    unittest.main()
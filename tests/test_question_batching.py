@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+# The router creates the Supabase handler at import time
+with mock.patch("game_utils.supabase_handler.get_supabase_handler"):
+    from api import routes
+
+
+class FakeGame:
+    """PlantGame stand-in that records each batch of questions it answers."""
+
+    batches = []
+    error = None
+
+    def __init__(self, dome_type, plant_name=None):
+        self.dome_type = dome_type
+        self.plant_name = plant_name
+
+    async def answer_plant_questions(self, questions):
+        FakeGame.batches.append((self.dome_type, self.plant_name, list(questions)))
+        if FakeGame.error is not None:
+            raise FakeGame.error
+        return {
+            "success": True,
+            "plant_name": self.plant_name,
+            "questions": questions,
+            "answers": [f"answer to {question}" for question in questions]
+        }
+
+
+class QuestionBatchingTest(unittest.TestCase):
+
+    def setUp(self):
+        FakeGame.batches = []
+        FakeGame.error = None
+        patcher = mock.patch.object(routes, "PlantGame", FakeGame)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _ask(self, *requests):
+        async def scenario():
+            return await asyncio.gather(*(
+                routes._answer_question_batched(dome, plant, question) for dome, plant, question in requests
+            ), return_exceptions=True)
+        return asyncio.run(scenario())
+
+    def test_questions_within_window_share_one_batch(self):
+        results = self._ask(
+            ("Tropical Dome", "Crinum asiaticum", "q1"),
+            ("Tropical Dome", "Crinum asiaticum", "q2"),
+        )
+
+        self.assertEqual(FakeGame.batches, [("Tropical Dome", "Crinum asiaticum", ["q1", "q2"])])
+        self.assertEqual([r["answer"] for r in results], ["answer to q1", "answer to q2"])
+        self.assertEqual(routes._pending_questions, {})
+
+    def test_batches_are_keyed_by_dome_and_plant(self):
+        results = self._ask(
+            ("Tropical Dome", "Crinum asiaticum", "q1"),
+            ("Desert Dome", "Crinum asiaticum", "q2"),
+        )
+
+        self.assertCountEqual(FakeGame.batches, [
+            ("Tropical Dome", "Crinum asiaticum", ["q1"]),
+            ("Desert Dome", "Crinum asiaticum", ["q2"]),
+        ])
+        self.assertEqual([r["answer"] for r in results], ["answer to q1", "answer to q2"])
+
+    def test_full_batch_flushes_before_the_window(self):
+        count = routes.QUESTION_BATCH_MAX + 1
+        with mock.patch.object(routes, "QUESTION_BATCH_WINDOW", 0.5):
+            async def scenario():
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                tasks = [
+                    asyncio.create_task(routes._answer_question_batched("Tropical Dome", "Crinum asiaticum", f"q{i}"))
+                    for i in range(count)
+                ]
+                first = await asyncio.gather(*tasks[:-1])
+                elapsed = loop.time() - started
+                last = await tasks[-1]
+                return first, last, elapsed
+
+            first, last, elapsed = asyncio.run(scenario())
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual([len(questions) for _, _, questions in FakeGame.batches], [routes.QUESTION_BATCH_MAX, 1])
+        self.assertEqual([r["answer"] for r in first], [f"answer to q{i}" for i in range(count - 1)])
+        self.assertEqual(last["answer"], f"answer to q{count - 1}")
+
+    def test_batch_failure_is_raised_to_every_caller(self):
+        FakeGame.error = RuntimeError("OpenAI unavailable")
+
+        results = self._ask(
+            ("Tropical Dome", "Crinum asiaticum", "q1"),
+            ("Tropical Dome", "Crinum asiaticum", "q2"),
+        )
+
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertIs(result, FakeGame.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+# The router creates the Supabase handler at import time
+with mock.patch("game_utils.supabase_handler.get_supabase_handler"):
+    from api import routes
+from settings import Settings
+
+
+class RefreshPlantsAuthTest(unittest.TestCase):
+
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(routes.router)
+        self.client = TestClient(app)
+
+    def _post(self, token, headers=None):
+        settings = Settings(None, None, None, None, None, admin_api_token=token)
+        with mock.patch.object(routes, "get_settings", lambda: settings), \
+                mock.patch.object(routes, "supabase_handler") as handler:
+            response = self.client.post("/api/game/refresh-plants", headers=headers or {})
+        return response, handler
+
+    def test_valid_token_refreshes(self):
+        response, handler = self._post("secret", {"Authorization": "Bearer secret"})
+
+        self.assertEqual(response.status_code, 200)
+        handler.refresh.assert_called_once_with()
+
+    def test_missing_or_wrong_token_is_rejected(self):
+        for headers in ({}, {"Authorization": "Bearer wrong"}):
+            response, handler = self._post("secret", headers)
+
+            self.assertEqual(response.status_code, 401)
+            handler.refresh.assert_not_called()
+
+    def test_endpoint_disabled_without_configured_token(self):
+        response, handler = self._post(None, {"Authorization": "Bearer "})
+
+        self.assertEqual(response.status_code, 403)
+        handler.refresh.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+from game_utils.response_cache import ResponseCache
+from game_utils.plant_summarizer import _normalize
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now the least recently used
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_make_key(self):
+        make_key = ResponseCache.make_key
+
+        self.assertEqual(make_key("summary", "ficus", "gpt-4o-mini", 500), make_key("summary", "ficus", "gpt-4o-mini", 500))
+        self.assertNotEqual(make_key("summary", "ficus", "gpt-4o-mini", 500), make_key("summary", "ficus", "gpt-4o-mini", 400))
+        self.assertNotEqual(make_key("summary", "ficus"), make_key("follow_up", "ficus"))
+        self.assertEqual(make_key({"a": 1, "b": 2}), make_key({"b": 2, "a": 1}))
+
+    def test_normalized_names_and_questions_share_keys(self):
+        self.assertEqual(_normalize("  Ficus   Lyrata "), _normalize("ficus lyrata"))
+        self.assertEqual(_normalize("How tall does it grow?"), _normalize("how tall does it grow"))
+        self.assertNotEqual(_normalize("How tall does it grow?"), _normalize("How wide does it grow?"))
+
+    def test_disk_entries_survive_a_new_cache(self):
+        try:
+            import diskcache  # noqa: F401
+        except ImportError:
+            self.skipTest("diskcache not installed")
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResponseCache(maxsize=1, cache_dir=cache_dir)
+            asyncio.run(cache.aset("a", "summary"))
+            cache.close()
+
+            reopened = ResponseCache(maxsize=1, cache_dir=cache_dir)
+            self.assertEqual(asyncio.run(reopened.aget("a")), "summary")
+            self.assertIsNone(asyncio.run(reopened.aget("missing")))
+            reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
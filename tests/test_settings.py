@@ -0,0 +1,36 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+from settings import Settings
+
+
+class SettingsTest(unittest.TestCase):
+
+    def test_nothing_missing_with_secret_key(self):
+        settings = Settings("https://example.supabase.co", "secret", None, "tavily", "openai")
+
+        self.assertEqual(settings.missing(), [])
+        self.assertEqual(settings.supabase_key, "secret")
+
+    def test_publishable_key_is_the_fallback(self):
+        settings = Settings("https://example.supabase.co", None, "publishable", "tavily", "openai")
+
+        self.assertEqual(settings.missing(), [])
+        self.assertEqual(settings.supabase_key, "publishable")
+
+    def test_missing_lists_every_unset_variable(self):
+        settings = Settings(None, None, "", None, "")
+
+        self.assertEqual(settings.missing(), [
+            "SUPABASE_URL",
+            "SUPABASE_SECRET_KEY or SUPABASE_PUBLISHABLE_KEY",
+            "TAVILY_API_KEY",
+            "OPENAI_API_KEY",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
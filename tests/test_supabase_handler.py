@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "user-service", "src"))
+
+from game_utils import supabase_handler
+from game_utils.supabase_handler import SupabaseHandler
+
+
+class PlantCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        with mock.patch.object(supabase_handler, "PlantService"), \
+                mock.patch.object(supabase_handler, "ImageService"):
+            self.handler = SupabaseHandler()
+        self.plant_service = self.handler.plant_service
+        self.plant_service.get_plant_id_by_scientific_name_and_dome.return_value = "id-1"
+        self.plant_service.get_plants_by_dome.return_value = [
+            {"id": "id-2", "scientific_name": "Crinum asiaticum", "dome": "Tropical Dome"},
+        ]
+        self.now = 1000.0
+        patcher = mock.patch.object(supabase_handler.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_plant_id_lookups_expire_after_ttl(self):
+        lookup = self.handler.get_plant_id_by_scientific_name_and_dome
+
+        self.assertEqual(lookup("Ficus lyrata", "Tropical Dome"), "id-1")
+        self.assertEqual(lookup("Ficus lyrata", "Tropical Dome"), "id-1")
+        self.assertEqual(self.plant_service.get_plant_id_by_scientific_name_and_dome.call_count, 1)
+
+        self.now += SupabaseHandler.PLANT_LIST_TTL + 1
+        self.assertEqual(lookup("Ficus lyrata", "Tropical Dome"), "id-1")
+        self.assertEqual(self.plant_service.get_plant_id_by_scientific_name_and_dome.call_count, 2)
+
+    def test_dome_load_indexes_plant_ids_until_they_expire(self):
+        self.handler.get_plants_by_dome("Tropical Dome")
+
+        self.assertEqual(self.handler.get_plant_id_by_scientific_name_and_dome("Crinum asiaticum", "Tropical Dome"), "id-2")
+        self.plant_service.get_plant_id_by_scientific_name_and_dome.assert_not_called()
+
+        self.now += SupabaseHandler.PLANT_LIST_TTL + 1
+        self.assertEqual(self.handler.get_plant_id_by_scientific_name_and_dome("Crinum asiaticum", "Tropical Dome"), "id-1")
+
+    def test_load_started_before_refresh_is_not_cached(self):
+        def refresh_during_query(dome):
+            self.handler.refresh()
+            return [{"id": "stale", "scientific_name": "Crinum asiaticum", "dome": dome}]
+
+        self.plant_service.get_plants_by_dome.side_effect = refresh_during_query
+        self.assertEqual(self.handler.get_plants_by_dome("Tropical Dome"), ("Crinum asiaticum",))
+
+        self.assertEqual(self.handler._plants_by_dome, {})
+        self.assertEqual(self.handler._plant_ids, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import csv
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+spec = importlib.util.spec_from_file_location("upload_correct_wiki_images", ROOT / "scripts" / "upload_correct_wiki_images.py")
+upload_script = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(upload_script)
+
+
+def find_image_file_by_glob(plant_name, wiki_images_dir):
+    """The per-plant directory scan that build_image_index replaced (globs sorted for a stable order)."""
+    slug = upload_script.slugify_name(plant_name)
+    exact_path = wiki_images_dir / f"{slug}.jpg"
+    if exact_path.exists():
+        return exact_path
+
+    for img_file in sorted(wiki_images_dir.glob("*.jpg")):
+        if img_file.stem.lower() == slug.lower():
+            return img_file
+
+    words = plant_name.split()
+    if len(words) >= 2:
+        two_word_path = wiki_images_dir / f"{upload_script.slugify_name(f'{words[0]} {words[1]}')}.jpg"
+        if two_word_path.exists():
+            return two_word_path
+
+    first_word = words[0] if words else plant_name
+    matches = sorted(wiki_images_dir.glob(f"{first_word}_*.jpg"))
+    if matches:
+        if len(words) >= 2:
+            two_word_prefix = f"{words[0]}_{words[1]}"
+            for match in matches:
+                if match.stem.lower().startswith(two_word_prefix.lower()):
+                    return match
+        return matches[0]
+
+    slug_no_underscore = slug.replace('_', '')
+    for img_file in sorted(wiki_images_dir.glob("*.jpg")):
+        if img_file.stem.replace('_', '').lower() == slug_no_underscore.lower():
+            return img_file
+    return None
+
+
+class BuildImageIndexTest(unittest.TestCase):
+
+    def assert_same_lookups(self, wiki_images_dir, plant_names):
+        image_index = upload_script.build_image_index(wiki_images_dir)
+        for plant_name in plant_names:
+            with self.subTest(plant_name=plant_name):
+                self.assertEqual(
+                    upload_script.find_image_file(plant_name, image_index),
+                    find_image_file_by_glob(plant_name, wiki_images_dir)
+                )
+
+    def test_each_lookup_rule_matches_the_directory_scan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            wiki_images_dir = Path(tmp)
+            for stem in ["Ficus_lyrata", "adansonia_digitata", "Aloe_vera_var_chinensis", "Aloe_arborescens",
+                         "Agave_americana_Marginata", "Crinum", "Crinumasiaticum", "Musa_x_paradisiaca"]:
+                (wiki_images_dir / f"{stem}.jpg").write_bytes(b"")
+            (wiki_images_dir / "notes.txt").write_bytes(b"")
+
+            self.assert_same_lookups(wiki_images_dir, [
+                "Ficus lyrata",                  # exact slug
+                "Adansonia digitata",            # case-insensitive
+                "Aloe vera 'Chinensis'",         # partial match preferring the first two words
+                "Aloe ferox",                    # partial match on the first word
+                "Agave americana",               # partial match
+                "Crinum asiaticum",              # without underscores
+                "Musa × paradisiaca",            # non-ASCII characters
+                "Welwitschia mirabilis",         # no image
+            ])
+
+    def test_eval_plants_match_the_directory_scan(self):
+        wiki_images_dir = ROOT / "data" / "wiki_images"
+        eval_csv = ROOT / "data" / "bioclip_wikipedia_eval.csv"
+        if not wiki_images_dir.is_dir() or not eval_csv.exists():
+            self.skipTest("wiki images or evaluation results not available")
+
+        with open(eval_csv, newline="", encoding="utf-8") as f:
+            plant_names = [row["plant_name"] for row in csv.DictReader(f)]
+        self.assert_same_lookups(wiki_images_dir, plant_names)
+
+
+if __name__ == "__main__":
+    unittest.main()
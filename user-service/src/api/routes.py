@@ -1,12 +1,112 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+import asyncio
+import hmac
+import orjson
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from plant_game import PlantGame
-from game_utils.supabase_handler import SupabaseHandler
+from game_utils.supabase_handler import get_supabase_handler
+from settings import get_settings
 
 # Create router
 router = APIRouter(prefix="/api/game", tags=["plant-game"])
 
 # Initialize the game service
-supabase_handler = SupabaseHandler()
+supabase_handler = get_supabase_handler()
+
+# In-flight summaries keyed by plant name, so concurrent requests for the same
+# plant share one Tavily + OpenAI round-trip instead of each paying for it
+_inflight_summaries: dict[str, asyncio.Task] = {}
+
+
+async def _summarize_single_flight(dome_type: str, plant_name: str) -> dict:
+    """Summarize a plant, awaiting an already running summary for the same plant if there is one."""
+    task = _inflight_summaries.get(plant_name)
+    if task is not None:
+        return await asyncio.shield(task)
+
+    game = PlantGame(dome_type=dome_type, plant_name=plant_name)
+    task = asyncio.create_task(game.summarize_plant())
+    _inflight_summaries[plant_name] = task
+    try:
+        return await asyncio.shield(task)
+    finally:
+        if _inflight_summaries.get(plant_name) is task:
+            _inflight_summaries.pop(plant_name, None)
+
+
+# Questions about the same plant in the same dome that arrive within QUESTION_BATCH_WINDOW
+# seconds are answered together (concurrent Tavily searches + one OpenAI request)
+QUESTION_BATCH_WINDOW = 0.015
+QUESTION_BATCH_MAX = 8
+_pending_questions: dict[tuple[str, str], list[tuple[str, asyncio.Future]]] = {}
+_question_batch_tasks: set[asyncio.Task] = set()
+
+
+async def _answer_question_batched(dome_type: str, plant_name: str, question: str) -> dict:
+    """Queue a question for plant_name and wait for the answer from its batch."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    key = (dome_type, plant_name)
+    pending = _pending_questions.get(key)
+    if pending is None:
+        pending = _pending_questions[key] = []
+        loop.call_later(QUESTION_BATCH_WINDOW, _flush_questions, dome_type, plant_name, pending)
+    pending.append((question, future))
+    
+    if len(pending) >= QUESTION_BATCH_MAX:
+        _flush_questions(dome_type, plant_name, pending)
+    return await future
+
+
+def _flush_questions(dome_type: str, plant_name: str, pending: list[tuple[str, asyncio.Future]]):
+    """Start answering a batch of pending questions (no-op if it was already started)."""
+    key = (dome_type, plant_name)
+    if _pending_questions.get(key) is not pending:
+        return
+    del _pending_questions[key]
+    
+    task = asyncio.create_task(_answer_question_batch(dome_type, plant_name, pending))
+    _question_batch_tasks.add(task)
+    task.add_done_callback(_question_batch_tasks.discard)
+
+
+async def _answer_question_batch(dome_type: str, plant_name: str, pending: list[tuple[str, asyncio.Future]]):
+    """Answer a batch of questions and resolve each caller's future."""
+    try:
+        game = PlantGame(dome_type=dome_type, plant_name=plant_name)
+        result = await game.answer_plant_questions([question for question, _ in pending])
+    except Exception as e:
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(e)
+        return
+    
+    for i, (_, future) in enumerate(pending):
+        if future.done():  # caller disconnected
+            continue
+        if result.get("success"):
+            future.set_result({
+                "success": True,
+                "plant_name": result["plant_name"],
+                "answer": result["answers"][i]
+            })
+        else:
+            future.set_result(result)
+
+
+async def _sse_events(chunks):
+    """
+    Format text chunks as server-sent events: one "data: {"content": ...}" event per
+    chunk, then an "event: done" event (or "event: error" if generation fails).
+    """
+    try:
+        async for chunk in chunks:
+            yield f"data: {orjson.dumps({'content': chunk}).decode()}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {orjson.dumps({'error': str(e)}).decode()}\n\n"
 
 @router.get("/start-game")
 async def create_game(dome_type: str):
@@ -17,7 +117,8 @@ async def create_game(dome_type: str):
     """
     try:
         game = PlantGame(dome_type=dome_type) # plant_name is None at this point
-        plant_name = game.get_random_plant()
+        # May hit the database (plant list cache miss), so keep it off the event loop
+        plant_name = await asyncio.to_thread(game.get_random_plant)
         # No longer using database images, using Wikipedia instead
         return {
             "success": True,
@@ -30,6 +131,29 @@ async def create_game(dome_type: str):
         )
 
 
+def require_admin_token(authorization: Optional[str] = Header(None)):
+    """
+    Allow only requests with "Authorization: Bearer <ADMIN_API_TOKEN>".
+    Admin-only endpoints are disabled when ADMIN_API_TOKEN is not set.
+    """
+    token = get_settings().admin_api_token
+    if not token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_TOKEN is not set)")
+    if not authorization or not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.post("/refresh-plants", dependencies=[Depends(require_admin_token)])
+async def refresh_plants():
+    """
+    Drop the cached plant list and lookups so changes made in the admin service
+    are picked up without waiting for the cache to expire.
+    Called by the admin service after it saves plants; requires the admin token.
+    """
+    await asyncio.to_thread(supabase_handler.refresh)
+    return {"success": True}
+
+
 @router.post("/submit-image")
 async def submit_plant_image(image: UploadFile = File(...), dome_type: str = Form(...), plant_name: str = Form(...)):
     """
@@ -43,8 +167,9 @@ async def submit_plant_image(image: UploadFile = File(...), dome_type: str = For
         # Reset the game instance
         game = PlantGame(dome_type=dome_type, plant_name=plant_name)
         
-        # Process through game logic
-        result = game.verify_and_upload_image(image_bytes)
+        # Process through game logic off the event loop so concurrent uploads
+        # can be batched together by the image encoder
+        result = await game.verify_and_upload_image(image_bytes)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
@@ -58,9 +183,7 @@ async def summarize_plant(dome_type: str = Form(...), plant_name: str = Form(...
     Otherwise, summarizes the current plant from the game.
     """
     try:
-        # Reset the game instance
-        game = PlantGame(dome_type=dome_type, plant_name=plant_name)
-        result = game.summarize_plant()
+        result = await _summarize_single_flight(dome_type, plant_name)
         
         if not result.get("success"):
             raise HTTPException(
@@ -81,6 +204,16 @@ async def summarize_plant(dome_type: str = Form(...), plant_name: str = Form(...
         )
 
 
+@router.post("/summarize-stream")
+async def summarize_plant_stream(dome_type: str = Form(...), plant_name: str = Form(...)):
+    """
+    Stream a summary of a plant as server-sent events, so the first words
+    arrive as soon as OpenAI generates them.
+    """
+    game = PlantGame(dome_type=dome_type, plant_name=plant_name)
+    return StreamingResponse(_sse_events(game.summarize_plant_stream()), media_type="text/event-stream")
+
+
 @router.post("/ask-question")
 async def ask_plant_question(question: str = Form(...), dome_type: str = Form(...), plant_name: str = Form(...)):
     """
@@ -88,9 +221,8 @@ async def ask_plant_question(question: str = Form(...), dome_type: str = Form(..
     The game must have a current plant set (from get_random_plant).
     """
     try:
-        # Reset the game instance
-        game = PlantGame(dome_type=dome_type, plant_name=plant_name)
-        result = game.answer_plant_question(question)
+        # Answered together with other questions about the same plant asked at the same time
+        result = await _answer_question_batched(dome_type, plant_name, question)
         
         if not result.get("success"):
             raise HTTPException(
@@ -110,4 +242,13 @@ async def ask_plant_question(question: str = Form(...), dome_type: str = Form(..
         raise HTTPException(
             status_code=500,
             detail=f"Error answering question: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/ask-question-stream")
+async def ask_plant_question_stream(question: str = Form(...), dome_type: str = Form(...), plant_name: str = Form(...)):
+    """
+    Stream the answer to a follow-up question as server-sent events.
+    """
+    game = PlantGame(dome_type=dome_type, plant_name=plant_name)
+    return StreamingResponse(_sse_events(game.answer_plant_question_stream(question)), media_type="text/event-stream")
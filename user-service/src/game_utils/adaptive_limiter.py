@@ -0,0 +1,93 @@
+"""
+Adaptive concurrency limit for rate-limited HTTP APIs.
+Caps the number of requests in flight and adjusts the cap from the responses:
+a 429 halves it and pauses new requests for the Retry-After period, successful
+responses grow it back by one (up to max_limit) while the API reports request
+budget remaining.
+"""
+import asyncio
+import time
+import httpx
+from typing import Optional
+
+
+class AdaptiveLimiter:
+    """Async context manager limiting concurrent requests, sized from rate-limit responses."""
+
+    def __init__(self, max_limit: int = 8, min_limit: int = 1):
+        """
+        Create the limiter.
+
+        Args:
+            max_limit: Maximum (and initial) number of concurrent requests
+            min_limit: The limit never shrinks below this
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = self.max_limit
+        self._in_flight = 0
+        self._paused_until = 0.0
+        # Created on first use so the limiter can be constructed outside the event loop
+        self._condition = None
+
+    async def __aenter__(self):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+        # Honour a Retry-After pause announced by a rate-limited response.
+        # __aexit__ does not run if this raises (e.g. the caller is cancelled), so the
+        # slot is released here
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                await self._release()
+                raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._release()
+
+    async def _release(self):
+        """Give the slot back and wake the waiting requests."""
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def update(self, response: httpx.Response) -> Optional[float]:
+        """
+        Adjust the limit from a response's status and rate-limit headers.
+        Call while holding a slot (inside "async with limiter").
+
+        Returns:
+            Seconds to wait before retrying (from Retry-After) for a 429, otherwise None
+        """
+        if response.status_code == 429:
+            self.limit = max(self.min_limit, self.limit // 2)
+            retry_after = _retry_after(response)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            return retry_after
+
+        if response.is_success and self.limit < self.max_limit:
+            remaining = response.headers.get("x-ratelimit-remaining-requests")
+            if remaining is None or not remaining.isdigit() or int(remaining) > self.limit:
+                # Waiters re-check the limit when the caller's slot is released
+                self.limit += 1
+        return None
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Parse retry-after-ms / retry-after (seconds) from a response, or None if absent."""
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return None
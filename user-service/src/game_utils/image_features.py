@@ -0,0 +1,328 @@
+"""
+Shared BioCLIP image encoding for PlantClassifier and PlantHealthAssessor.
+Both consumers use the same vision encoder, so a request that identifies a plant
+and then assesses its health can encode the image once and pass the features to both.
+
+Images are preprocessed on the calling thread; the forward passes of concurrent
+encode_image calls for the same model are coalesced by a MicroBatcher into one batch
+(BIOCLIP_MAX_BATCH_SIZE images, waiting up to BIOCLIP_BATCH_WAIT_MS).
+
+Set BIOCLIP_COMPILE=1 to compile the vision encoder with torch.compile (autotuned kernels on GPU);
+batches are then padded to power-of-two sizes so only a few static shapes are compiled (all at startup).
+
+Set BIOCLIP_ONNX=1 to run the vision encoder through ONNX Runtime (TensorRT/CUDA
+providers when available). The encoder is exported once to BIOCLIP_ONNX_DIR and the
+session is shared by every caller of that model; PyTorch is used if onnxruntime is not installed.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+import torch
+from typing import List, Optional, Union
+from PIL import Image
+from torchvision import transforms
+from torchvision.io import decode_image, ImageReadMode
+from torchvision.transforms import v2
+from torchvision.transforms.functional import pil_to_tensor
+from game_utils.micro_batcher import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+
+_ONNX_ENABLED = os.getenv("BIOCLIP_ONNX", "0") == "1"
+_ONNX_DIR = os.getenv("BIOCLIP_ONNX_DIR", "onnx_cache")
+_COMPILE_ENABLED = os.getenv("BIOCLIP_COMPILE", "0") == "1"
+_MAX_BATCH_SIZE = int(os.getenv("BIOCLIP_MAX_BATCH_SIZE", "16"))
+_BATCH_WAIT_MS = float(os.getenv("BIOCLIP_BATCH_WAIT_MS", "10"))
+
+# Tensor-based equivalents of BioCLIP's PIL preprocess, keyed by id(preprocess);
+# None means the preprocess could not be translated and PIL is used instead
+_tensor_transforms = {}
+
+# Image encode batchers keyed by id(model), shared by every consumer of that model
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+# id() of models whose encode_image has been replaced by a torch.compile'd version
+_compiled_models = set()
+
+# ONNX Runtime sessions keyed by (id(model), input dtype); None means ONNX is unavailable for that key
+_onnx_sessions = {}
+
+
+class _VisionEncoder(torch.nn.Module):
+    """Wrap model.encode_image as a module so it can be exported to ONNX."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values):
+        return self.model.encode_image(pixel_values)
+
+
+def _model_fingerprint(model) -> str:
+    """
+    Short hash of a model's parameter names, shapes and dtypes, so differently built
+    (e.g. quantized) models get separate ONNX exports on disk.
+    """
+    layout = "|".join(f"{name}:{tuple(t.shape)}:{t.dtype}" for name, t in model.state_dict().items() if torch.is_tensor(t))
+    return hashlib.sha1(layout.encode("utf-8")).hexdigest()[:12]
+
+
+def _get_onnx_session(model, example_input: torch.Tensor, device: str):
+    """
+    Get the shared ONNX Runtime session for the vision encoder, exporting it on first use.
+    
+    Returns:
+        onnxruntime.InferenceSession, or None if ONNX Runtime cannot be used
+    """
+    dtype = str(example_input.dtype).replace("torch.", "")
+    key = (id(model), dtype)
+    if key in _onnx_sessions:
+        return _onnx_sessions[key]
+
+    session = None
+    try:
+        import onnxruntime as ort
+
+        onnx_path = os.path.join(_ONNX_DIR, f"bioclip_vision_{_model_fingerprint(model)}_{dtype}.onnx")
+        if not os.path.exists(onnx_path):
+            logger.info("Exporting BioCLIP vision encoder to %s...", onnx_path)
+            os.makedirs(_ONNX_DIR, exist_ok=True)
+            torch.onnx.export(
+                _VisionEncoder(model),
+                example_input,
+                onnx_path,
+                input_names=["pixel_values"],
+                output_names=["image_features"],
+                dynamic_axes={"pixel_values": {0: "batch"}, "image_features": {0: "batch"}},
+                opset_version=17
+            )
+
+        available = ort.get_available_providers()
+        providers = []
+        if device == "cuda":
+            providers = [p for p in ("TensorrtExecutionProvider", "CUDAExecutionProvider") if p in available]
+        providers.append("CPUExecutionProvider")
+
+        session = ort.InferenceSession(onnx_path, providers=providers)
+        logger.info("BioCLIP vision encoder running on ONNX Runtime (%s)", session.get_providers()[0])
+    except Exception as e:
+        logger.warning("ONNX Runtime unavailable, using PyTorch for image encoding: %s", e)
+
+    _onnx_sessions[key] = session
+    return session
+
+
+def compile_image_encoder(model, device: str):
+    """
+    Compile model.encode_image with torch.compile when BIOCLIP_COMPILE=1.
+    Uses mode="max-autotune-no-cudagraphs" on GPU: CUDA graphs are recorded per thread,
+    so graphs captured by a warm-up on this thread would not be reused by the batcher
+    thread that runs the real encodes, while compiled kernels are shared by all threads.
+    Warms up every padded batch size so requests do not pay the compile cost.
+    Falls back to eager on any error.
+    Skipped when the ONNX backend is enabled, since that exports the eager encoder.
+    
+    Args:
+        model: Loaded BioCLIP model (already moved to device and cast)
+        device: Device the model lives on ("cuda" or "cpu")
+    """
+    if not _COMPILE_ENABLED or _ONNX_ENABLED or id(model) in _compiled_models:
+        return
+    
+    logger.info("Compiling BioCLIP vision encoder with torch.compile...")
+    eager_encode_image = model.encode_image
+    try:
+        mode = "max-autotune-no-cudagraphs" if device == "cuda" else "default"
+        compiled = torch.compile(eager_encode_image, mode=mode, fullgraph=True, dynamic=False)
+        
+        image_size = getattr(model.visual, "image_size", 224)
+        height, width = image_size if isinstance(image_size, (tuple, list)) else (image_size, image_size)
+        dtype = torch.float16 if device == "cuda" else torch.float32
+        with torch.inference_mode():
+            for batch_size in sorted({_padded_batch_size(n) for n in range(1, _MAX_BATCH_SIZE + 1)}):
+                compiled(torch.zeros(batch_size, 3, height, width, dtype=dtype, device=device))
+        
+        model.encode_image = compiled
+        _compiled_models.add(id(model))
+        logger.info("BioCLIP vision encoder compiled!")
+    except Exception as e:
+        logger.warning("torch.compile failed, using eager image encoding: %s", e)
+
+
+def _padded_batch_size(batch_size: int) -> int:
+    """Round a batch size up to the next power of two (capped at the batcher's max)."""
+    padded = 1
+    while padded < batch_size:
+        padded *= 2
+    return max(batch_size, min(padded, _MAX_BATCH_SIZE))
+
+
+def _get_tensor_transform(preprocess):
+    """
+    Translate open_clip's PIL preprocess (Resize, CenterCrop, ToTensor, Normalize) into a
+    torchvision.transforms.v2 pipeline that runs directly on uint8 image tensors.
+    Built once per preprocess object.
+    
+    Returns:
+        v2.Compose pipeline, or None if the preprocess contains a step we don't recognize
+    """
+    key = id(preprocess)
+    if key in _tensor_transforms:
+        return _tensor_transforms[key]
+
+    steps = []
+    for step in getattr(preprocess, "transforms", []):
+        if isinstance(step, transforms.Resize):
+            steps.append(v2.Resize(step.size, interpolation=step.interpolation, max_size=step.max_size, antialias=True))
+        elif isinstance(step, transforms.CenterCrop):
+            steps.append(v2.CenterCrop(step.size))
+        elif isinstance(step, transforms.Normalize):
+            steps.append(v2.ToDtype(torch.float32, scale=True))
+            steps.append(v2.Normalize(step.mean, step.std))
+        elif isinstance(step, transforms.ToTensor) or type(step).__name__ in ("MaybeConvertMode", "MaybeToTensor") \
+                or getattr(step, "__name__", "") == "_convert_to_rgb":
+            # RGB conversion and uint8 -> tensor happen when decoding
+            continue
+        else:
+            steps = None
+            break
+
+    pipeline = v2.Compose(steps) if steps else None
+    _tensor_transforms[key] = pipeline
+    return pipeline
+
+
+def _preprocess_image(image: Union[bytes, Image.Image], preprocess) -> torch.Tensor:
+    """
+    Decode and preprocess image bytes into a 3 x H x W float tensor.
+    Uses torchvision's decoders and a tensor transform pipeline, falling back to
+    PIL + the original preprocess for formats torchvision cannot decode.
+    An already decoded PIL image is converted to a tensor without decoding again.
+    """
+    pipeline = _get_tensor_transform(preprocess)
+    if isinstance(image, Image.Image):
+        image = image.convert('RGB')
+        return pipeline(pil_to_tensor(image)) if pipeline is not None else preprocess(image)
+    if pipeline is not None:
+        try:
+            raw = torch.frombuffer(bytearray(image), dtype=torch.uint8)
+            return pipeline(decode_image(raw, mode=ImageReadMode.RGB))
+        except RuntimeError:
+            pass
+
+    pil_image = Image.open(io.BytesIO(image)).convert('RGB')
+    return preprocess(pil_image)
+
+
+def _to_device(image_tensor: torch.Tensor, device: str) -> torch.Tensor:
+    """
+    Move a preprocessed image tensor to the model's device.
+    CPU tensors bound for CUDA are pinned and copied with non_blocking=True, so the
+    host-to-device copy is queued on the default stream and overlaps with whatever
+    batch the GPU is currently running.
+    """
+    if device == "cuda" and image_tensor.device.type == "cpu":
+        return image_tensor.pin_memory().to(device, non_blocking=True)
+    return image_tensor.to(device)
+
+
+def _encode_batch(tensors: List[torch.Tensor], model, device: str) -> List[torch.Tensor]:
+    """
+    Encode a batch of preprocessed image tensors (3 x H x W, already on device) in a
+    single forward pass.
+    
+    Returns:
+        One D-dim normalized feature row per input tensor
+    """
+    count = len(tensors)
+    
+    # One forward pass for the whole batch; compiled encoders get a padded,
+    # power-of-two batch so they only ever see a handful of static shapes
+    if id(model) in _compiled_models and _padded_batch_size(count) > count:
+        padding = tensors[0].new_zeros(tensors[0].shape)
+        tensors = tensors + [padding] * (_padded_batch_size(count) - count)
+    image_tensor = torch.stack(tensors, dim=0)
+    
+    if device == "cuda":
+        image_tensor = image_tensor.half()
+    
+    session = _get_onnx_session(model, image_tensor, device) if _ONNX_ENABLED else None
+    
+    with torch.inference_mode():
+        if session is not None:
+            outputs = session.run(None, {"pixel_values": image_tensor.cpu().numpy()})
+            image_features = torch.from_numpy(outputs[0]).to(device)
+        else:
+            image_features = model.encode_image(image_tensor)
+        image_features /= image_features.norm(dim=-1, keepdim=True)
+    
+    # Drop padding rows (if any)
+    return list(image_features[:count])
+
+
+def _get_batcher(model, device: str) -> MicroBatcher:
+    """Get (or start) the shared image encode batcher for a model."""
+    key = id(model)
+    with _batchers_lock:
+        if key not in _batchers:
+            _batchers[key] = MicroBatcher(
+                lambda tensors: _encode_batch(tensors, model, device),
+                max_batch_size=_MAX_BATCH_SIZE,
+                max_wait_ms=_BATCH_WAIT_MS,
+                name="bioclip-image-batcher"
+            )
+        return _batchers[key]
+
+
+def encode_image(image: Union[bytes, Image.Image], model, preprocess, device: str) -> torch.Tensor:
+    """
+    Encode an image into normalized BioCLIP image features.
+    The image is decoded and preprocessed on the calling thread, so preprocessing of
+    new requests overlaps with the batch the model is running; the forward pass is
+    batched with concurrent calls by the model's MicroBatcher.
+    
+    Args:
+        image: Image bytes, or an already decoded PIL image
+        model: Loaded BioCLIP model
+        preprocess: BioCLIP validation transform
+        device: Device the model lives on ("cuda" or "cpu")
+        
+    Returns:
+        1 x D tensor of L2-normalized image features (FP16 on CUDA)
+    """
+    image_tensor = _to_device(_preprocess_image(image, preprocess), device)
+    return _get_batcher(model, device)(image_tensor).unsqueeze(0)
+
+
+def encode_images(images: List[bytes], model, preprocess, device: str) -> List[Optional[torch.Tensor]]:
+    """
+    Encode several images at once.
+    All images are preprocessed first and then queued on the model's MicroBatcher
+    together, so a single caller gets batched forward passes too.
+    
+    Args:
+        images: List of image bytes
+        model: Loaded BioCLIP model
+        preprocess: BioCLIP validation transform
+        device: Device the model lives on ("cuda" or "cpu")
+        
+    Returns:
+        One 1 x D tensor of L2-normalized image features per image, in order;
+        None for images that could not be decoded
+    """
+    batcher = _get_batcher(model, device)
+    futures = []
+    for image in images:
+        try:
+            image_tensor = _to_device(_preprocess_image(image, preprocess), device)
+        except Exception as e:
+            logger.error("Error preprocessing image: %s", e)
+            futures.append(None)
+            continue
+        futures.append(batcher.submit(image_tensor))
+    return [future.result().unsqueeze(0) if future is not None else None for future in futures]
@@ -0,0 +1,71 @@
+"""
+Micro-batching for model inference.
+Calls that arrive within a short window are coalesced into one batched call on a
+background thread, so concurrent requests share a single forward pass instead of
+each running the model at batch size 1.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+
+class MicroBatcher:
+    """Coalesce concurrent submit() calls into batched calls of batch_fn."""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 16, max_wait_ms: float = 10.0, name: str = "micro-batcher"):
+        """
+        Start the batching worker thread.
+        
+        Args:
+            batch_fn: Called with a list of items; must return one result per item, in order.
+                      A result that is an Exception is raised to that item's caller only.
+            max_batch_size: Maximum number of items per batch
+            max_wait_ms: How long to wait for more items after the first one arrives
+            name: Name of the worker thread
+        """
+        self._batch_fn = batch_fn
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item and return a Future resolved with its result."""
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """Queue an item and block until its result is ready."""
+        return self.submit(item).result()
+
+    def _run(self):
+        """Worker loop: collect up to max_batch_size items or until max_wait elapses, then dispatch."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = self._batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
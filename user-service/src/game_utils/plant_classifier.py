@@ -1,8 +1,31 @@
+import logging
+import math
+import os
 import open_clip
 import torch
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple, Union
 from PIL import Image
-import io
-from game_utils.supabase_handler import SupabaseHandler
+from game_utils.supabase_handler import get_supabase_handler
+from game_utils.image_features import compile_image_encoder, encode_image, encode_images
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ClassificationResult:
+    """Result of PlantClassifier.classify_image / predict_image."""
+    __slots__ = ("success", "plant_name", "confidence", "top_5")
+    success: bool
+    plant_name: Optional[str]
+    confidence: float
+    top_5: List[Tuple[str, float]]
+
+    def to_dict(self) -> dict:
+        """Convert to a JSON-serializable dictionary."""
+        return asdict(self)
+
 
 class PlantClassifier:
     # Class-level cache to avoid reloading model for each instance
@@ -10,8 +33,20 @@ class PlantClassifier:
     _preprocess = None
     _tokenizer = None
     _device = None
-    _text_features_cache = None
+    _text_features_cache_T = None  # D x N, stored transposed + contiguous for the similarity GEMM
+    _text_features_int8_T = None  # D x N INT8 copy for large catalogs on CPU
+    _text_features_scale = None  # Per-plant dequantization scale for the INT8 copy
     _scientific_names_cache = None
+    _faiss_index = None  # Optional FAISS index over the text features (BIOCLIP_FAISS=1)
+    
+    # Number of plant names tokenized and encoded per text encoder call
+    TEXT_ENCODE_BATCH_SIZE = 256
+    
+    # Above this many plants the FAISS index is IVF-PQ (approximate, compressed) instead of exact
+    FAISS_IVFPQ_MIN_PLANTS = 100_000
+    
+    # On CPU, at or above this many plants the similarity GEMM runs on INT8 text features
+    INT8_SIMILARITY_MIN_PLANTS = 50_000
     
     def __init__(self):
         """Initialize the classifier, loading model only once."""
@@ -25,11 +60,11 @@ class PlantClassifier:
 
     def _load_model(self):
         """Load BioCLIP model and precompute text features from database."""
-        print("Loading BioCLIP model...")
+        logger.info("Loading BioCLIP model...")
         
         # Setup device
         PlantClassifier._device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Using device: {PlantClassifier._device}")
+        logger.info("Using device: %s", PlantClassifier._device)
         
         # Load BioCLIP
         model, _, preprocess_val = open_clip.create_model_and_transforms('hf-hub:imageomics/bioclip')
@@ -41,6 +76,13 @@ class PlantClassifier:
         # Enable FP16 for faster inference on GPU
         if PlantClassifier._device == "cuda":
             model = model.half()
+        elif os.getenv("BIOCLIP_CPU_INT8", "0") == "1":
+            # INT8 dynamic quantization of the vision tower's Linear layers for faster CPU
+            # image encoding (the text tower runs once at startup and stays FP32)
+            model.visual = torch.ao.quantization.quantize_dynamic(model.visual, {torch.nn.Linear}, dtype=torch.qint8)
+        
+        # Optionally compile the vision encoder (BIOCLIP_COMPILE=1)
+        compile_image_encoder(model, PlantClassifier._device)
         
         # Store in class variables
         PlantClassifier._model = model
@@ -50,104 +92,230 @@ class PlantClassifier:
         # Precompute text features from database
         self._precompute_text_features()
         
-        print(f"BioCLIP model loaded! {len(PlantClassifier._scientific_names_cache)} plants indexed.")
+        logger.info("BioCLIP model loaded! %s plants indexed.", len(PlantClassifier._scientific_names_cache))
 
     def _precompute_text_features(self):
         """Load plants from database and precompute their text embeddings."""
-        print("Loading plants from database...")
-        
-        # Get all plants from database
-        db_handler = SupabaseHandler()
-        all_plants = db_handler.get_all_plants_by_scientific_name()
+        logger.info("Loading plants from database...")
         
-        # Extract scientific names
-        PlantClassifier._scientific_names_cache = [
-            plant["scientific_name"] for plant in all_plants
-        ]
+        # Get all plant names from database (name column only, fetched in pages)
+        db_handler = get_supabase_handler()
+        PlantClassifier._scientific_names_cache = db_handler.get_all_scientific_names()
         
-        print(f"Found {len(PlantClassifier._scientific_names_cache)} plants in database")
+        logger.info("Found %s plants in database", len(PlantClassifier._scientific_names_cache))
         
-        # Tokenize all plant names
-        text = PlantClassifier._tokenizer(PlantClassifier._scientific_names_cache).to(PlantClassifier._device)
-        
-        # Encode text features
-        with torch.no_grad():
-            text_features = PlantClassifier._model.encode_text(text)
+        # Encode plant names in chunks so a large database does not tokenize and
+        # encode everything in one huge batch; chunks are concatenated once at the end
+        names = PlantClassifier._scientific_names_cache
+        chunks = []
+        with torch.inference_mode():
+            for start in range(0, len(names), self.TEXT_ENCODE_BATCH_SIZE):
+                text = PlantClassifier._tokenizer(names[start:start + self.TEXT_ENCODE_BATCH_SIZE]).to(PlantClassifier._device)
+                chunks.append(PlantClassifier._model.encode_text(text))
+            
+            text_features = torch.cat(chunks, dim=0)
             text_features /= text_features.norm(dim=-1, keepdim=True)
             
             if PlantClassifier._device == "cuda":
                 text_features = text_features.half()
             
-            PlantClassifier._text_features_cache = text_features
+            # Store transposed once so predict_image multiplies against a contiguous D x N matrix
+            PlantClassifier._text_features_cache_T = text_features.t().contiguous()
+            
+            # Large catalogs make the CPU similarity memory-bound on the feature matrix;
+            # keep a symmetric per-plant INT8 copy (4x fewer bytes than FP32) for that case
+            if PlantClassifier._device == "cpu" and len(names) >= self.INT8_SIMILARITY_MIN_PLANTS:
+                PlantClassifier._text_features_int8_T, PlantClassifier._text_features_scale = \
+                    self._quantize_text_features(text_features)
+            else:
+                PlantClassifier._text_features_int8_T = None
+                PlantClassifier._text_features_scale = None
+        
+        if os.getenv("BIOCLIP_FAISS", "0") == "1":
+            self._build_faiss_index(text_features)
+        
+        logger.info("Text features precomputed and cached!")
+
+    def _build_faiss_index(self, text_features: torch.Tensor):
+        """
+        Build a FAISS inner-product index over the normalized text features.
+        Uses an exact IndexFlatIP for normal database sizes and IndexIVFPQ once the
+        plant table exceeds FAISS_IVFPQ_MIN_PLANTS. Falls back to the dense matmul
+        if faiss is not installed.
+        """
+        try:
+            import faiss
+        except ImportError:
+            logger.warning("faiss not installed, using dense similarity search")
+            PlantClassifier._faiss_index = None
+            return
+        
+        vectors = text_features.float().cpu().numpy()
+        n, d = vectors.shape
+        
+        if n >= self.FAISS_IVFPQ_MIN_PLANTS and d % 64 == 0:
+            nlist = int(4 * math.sqrt(n))
+            quantizer = faiss.IndexFlatIP(d)
+            index = faiss.IndexIVFPQ(quantizer, d, nlist, 64, 8, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.nprobe = 16
+        else:
+            index = faiss.IndexFlatIP(d)
+        index.add(vectors)
+        
+        if PlantClassifier._device == "cuda" and hasattr(faiss, "StandardGpuResources"):
+            index = faiss.index_cpu_to_gpu(faiss.StandardGpuResources(), 0, index)
+        
+        PlantClassifier._faiss_index = index
+        logger.info("FAISS index built (%s, %s plants)", type(index).__name__, n)
+
+    def encode_image(self, image: Union[bytes, Image.Image]) -> torch.Tensor:
+        """
+        Encode an image into normalized BioCLIP image features.
+        The image can be bytes or an already decoded PIL image (which is not decoded again).
+        The result can be passed to classify_image and PlantHealthAssessor.assess_plant_health
+        so the vision encoder only runs once per request.
+        """
+        return encode_image(image, self.model, self.preprocess, self.device)
+
+    @property
+    def min_confidence(self) -> float:
+        """
+        Confidence below which a classification should be treated as an unclear image.
+        Depends on the ranking path, since the FAISS path's top-5 softmax is inflated.
+        """
+        settings = get_settings()
+        if PlantClassifier._faiss_index is not None:
+            return settings.min_confidence_faiss
+        return settings.min_confidence
+
+    @staticmethod
+    def _quantize_text_features(text_features: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Quantize N x D text features to symmetric per-plant INT8.
         
-        print("Text features precomputed and cached!")
+        Returns:
+            (D x N INT8 matrix, per-plant dequantization scale)
+        """
+        scale = text_features.abs().amax(dim=-1).clamp(min=1e-8) / 127.0
+        text_features_int8 = (text_features / scale.unsqueeze(-1)).round().clamp(-127, 127).to(torch.int8)
+        return text_features_int8.t().contiguous(), scale
+
+    def _int8_similarity(self, image_features: torch.Tensor) -> torch.Tensor:
+        """
+        Cosine similarities against the INT8 text features: quantize the image features
+        per row, multiply with torch._int_mm (INT32 accumulation), then dequantize.
+        """
+        image_scale = image_features.abs().amax(dim=-1, keepdim=True).clamp(min=1e-8) / 127.0
+        image_int8 = (image_features / image_scale).round().clamp(-127, 127).to(torch.int8)
+        scores = torch._int_mm(image_int8, PlantClassifier._text_features_int8_T)
+        return scores.float() * image_scale * PlantClassifier._text_features_scale
 
-    def classify_image(self, image: bytes) -> dict:
+    def classify_image(self, image: Union[bytes, Image.Image], image_features: Optional[torch.Tensor] = None) -> ClassificationResult:
         """
         Classify an image of a plant.
+        If image_features is provided (from encode_image), the image is not encoded again.
         """
         try:
-            print("Classifying image...")
-            result = self.predict_image(image)
-            return {
-                "success": True,
-                "plant_name": result["plant_name"],
-                "confidence": result["confidence"],
-                "top_5": result["top_5"]
-            }
+            logger.debug("Classifying image...")
+            return self.predict_image(image, image_features=image_features)
         except Exception as e:
-            print(f"Error classifying image: {str(e)}")
-            return {
-                "success": False,
-                "plant_name": None,
-                "confidence": 0.0,
-                "top_5": []
-            }
+            logger.error("Error classifying image: %s", e)
+            return ClassificationResult(success=False, plant_name=None, confidence=0.0, top_5=[])
 
-    def predict_image(self, image: bytes) -> dict:
+    def classify_images(self, images: List[bytes]) -> List[ClassificationResult]:
+        """
+        Classify several plant images in one batch.
+        The images are encoded in batched forward passes and ranked with a single
+        similarity matmul. Images that fail get a success=False result.
+        """
+        failed = ClassificationResult(success=False, plant_name=None, confidence=0.0, top_5=[])
+        try:
+            logger.debug("Classifying %s images...", len(images))
+            features = encode_images(images, self.model, self.preprocess, self.device)
+            encoded = [i for i, image_features in enumerate(features) if image_features is not None]
+            results = [failed] * len(images)
+            if encoded:
+                ranked = self._rank(torch.cat([features[i] for i in encoded], dim=0))
+                for i, result in zip(encoded, ranked):
+                    results[i] = result
+            return results
+        except Exception as e:
+            logger.error("Error classifying images: %s", e)
+            return [failed] * len(images)
+
+    def predict_image(self, image: Union[bytes, Image.Image], image_features: Optional[torch.Tensor] = None) -> ClassificationResult:
         """
         Predict the name of a plant from an image.
-    
+        If image_features is provided (from encode_image), the image is not encoded again.
         """
         try:
-            # Load image from bytes
-            pil_image = Image.open(io.BytesIO(image)).convert('RGB')
-            
-            # Preprocess image
-            image_tensor = self.preprocess(pil_image).unsqueeze(0).to(self.device)
-            
-            if self.device == "cuda":
-                image_tensor = image_tensor.half()
-            
             # Get image features
-            with torch.no_grad():
-                image_features = self.model.encode_image(image_tensor)
-                image_features /= image_features.norm(dim=-1, keepdim=True)
-                
-                # Compare with cached text features
-                similarity = (100.0 * image_features @ PlantClassifier._text_features_cache.T).softmax(dim=-1)
+            if image_features is None:
+                image_features = self.encode_image(image)
             
-            # Get probabilities
-            probs = similarity[0].cpu().float().numpy()
+            return self._rank(image_features)[0]
             
-            # Get top prediction
-            top_idx = probs.argmax()
-            top_plant = PlantClassifier._scientific_names_cache[top_idx]
-            top_confidence = float(probs[top_idx])
+        except Exception as e:
+            logger.error("Error predicting image: %s", e)
+            raise
+
+    def _rank(self, image_features: torch.Tensor) -> List[ClassificationResult]:
+        """
+        Rank the indexed plants for each row of a B x D image feature matrix.
+        
+        Returns:
+            One ClassificationResult (top plant and top 5) per row
+        """
+        k = min(5, len(PlantClassifier._scientific_names_cache))
+        
+        if PlantClassifier._faiss_index is not None:
+            # Nearest plants from the FAISS index; confidence is a softmax over these k scores only
+            scores, indices = PlantClassifier._faiss_index.search(image_features.float().cpu().numpy(), k)
+            rows = []
+            for row_scores, row_indices in zip(scores, indices):
+                found = row_indices >= 0
+                rows.append((
+                    (100.0 * torch.from_numpy(row_scores[found])).softmax(dim=-1).tolist(),
+                    row_indices[found].tolist()
+                ))
+        else:
+            with torch.inference_mode():
+                # Compare with cached text features
+                logits = None
+                if PlantClassifier._text_features_int8_T is not None:
+                    try:
+                        logits = self._int8_similarity(image_features)
+                    except Exception as e:
+                        # torch._int_mm is a private op whose shape/device support varies
+                        # between torch builds; drop the INT8 copy and use the dense path
+                        logger.warning("INT8 similarity failed, using dense similarity: %s", e)
+                        PlantClassifier._text_features_int8_T = None
+                        PlantClassifier._text_features_scale = None
+                if logits is None:
+                    logits = image_features @ PlantClassifier._text_features_cache_T
+                similarity = (100.0 * logits).softmax(dim=-1)
+                
+                # Select the top 5 on-device; only these values are copied back to the CPU
+                top_probs, top_indices = torch.topk(similarity, k=k, dim=-1)
             
-            # Get top 5 predictions
-            top_5_indices = probs.argsort()[-5:][::-1]
+            rows = list(zip(top_probs.float().tolist(), top_indices.tolist()))
+        
+        results = []
+        for top_probs, top_indices in rows:
+            # Get top 5 predictions (sorted by probability, highest first)
             top_5 = [
-                (PlantClassifier._scientific_names_cache[i], float(probs[i]))
-                for i in top_5_indices
+                (PlantClassifier._scientific_names_cache[i], prob)
+                for i, prob in zip(top_indices, top_probs)
             ]
             
-            return {
-                "plant_name": top_plant,
-                "confidence": top_confidence,
-                "top_5": top_5
-            }
+            # Get top prediction
+            top_plant, top_confidence = top_5[0]
             
-        except Exception as e:
-            print(f"Error predicting image: {str(e)}")
-            raise
\ No newline at end of file
+            results.append(ClassificationResult(
+                success=True,
+                plant_name=top_plant,
+                confidence=top_confidence,
+                top_5=top_5
+            ))
+        return results
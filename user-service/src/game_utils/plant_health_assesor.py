@@ -2,22 +2,69 @@
 Plant health assessment module using BioCLIP's zero-shot classification.
 Analyzes plant images to determine health status using visual-text matching.
 """
+import logging
+import os
+import threading
 import open_clip
 import torch
-from PIL import Image
-import io
-from typing import Dict, List, Tuple
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+from game_utils.image_features import compile_image_encoder, encode_image
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HealthAssessment:
+    """
+    Result of PlantHealthAssessor.assess_plant_health.
+    Fields that don't apply to a result are None (the report fields on failure,
+    error on success) and are left out by to_dict().
+    """
+    __slots__ = (
+        "success", "overall_status", "health_score", "confidence", "visual_observations",
+        "issues_detected", "positive_indicators", "recommended_actions", "monitoring_notes",
+        "raw_health_probabilities", "error"
+    )
+    success: bool
+    overall_status: str
+    health_score: int
+    confidence: float
+    visual_observations: Optional[List[str]]
+    issues_detected: Optional[List[Dict]]
+    positive_indicators: Optional[List[str]]
+    recommended_actions: Optional[List[Dict]]
+    monitoring_notes: Optional[str]
+    raw_health_probabilities: Optional[Dict[str, float]]
+    error: Optional[str]
+
+    @classmethod
+    def failed(cls, error: str) -> "HealthAssessment":
+        """Build the result for an assessment that could not be completed."""
+        return cls(
+            success=False, overall_status="unknown", health_score=0, confidence=0.0,
+            visual_observations=None, issues_detected=None, positive_indicators=None,
+            recommended_actions=None, monitoring_notes=None, raw_health_probabilities=None,
+            error=error
+        )
+
+    def to_dict(self) -> Dict:
+        """Convert to a JSON-serializable dictionary (for storage and API responses)."""
+        return {key: value for key, value in asdict(self).items() if value is not None}
 
 
 # Module-level singleton instance
 _plant_health_assessor = None
+_plant_health_assessor_lock = threading.Lock()
 
 
 def get_plant_health_assessor():
-    """Get the shared PlantHealthAssessor instance (singleton pattern)."""
+    """Get the shared PlantHealthAssessor instance (singleton pattern, created once even under concurrent calls)."""
     global _plant_health_assessor
     if _plant_health_assessor is None:
-        _plant_health_assessor = PlantHealthAssessor()
+        with _plant_health_assessor_lock:
+            if _plant_health_assessor is None:
+                _plant_health_assessor = PlantHealthAssessor()
     return _plant_health_assessor
 
 
@@ -30,6 +77,10 @@ class PlantHealthAssessor:
     _tokenizer = None
     _device = None
     
+    # Precomputed text embeddings for the static category descriptions
+    _health_text_features = None
+    _issue_text_features = None
+    
     # Health status categories with detailed descriptions
     HEALTH_CATEGORIES = {
         "healthy": [
@@ -78,6 +129,37 @@ class PlantHealthAssessor:
         ]
     }
     
+    # Flattened descriptions and description -> category maps, built once at import
+    _HEALTH_TEXTS = [desc for descriptions in HEALTH_CATEGORIES.values() for desc in descriptions]
+    _HEALTH_STATUS_MAP = {desc: status for status, descriptions in HEALTH_CATEGORIES.items() for desc in descriptions}
+    _ISSUE_TEXTS = [desc for descriptions in ISSUE_CATEGORIES.values() for desc in descriptions]
+    _ISSUE_CATEGORY_MAP = {desc: category for category, descriptions in ISSUE_CATEGORIES.items() for desc in descriptions}
+    
+    # Recommended action per issue category; "severe_urgency" overrides "urgency" for severe issues
+    _ISSUE_ACTIONS = {
+        "pest_damage": {
+            "action": "Inspect for pests and apply appropriate treatment",
+            "urgency": "within_week",
+            "severe_urgency": "immediate",
+            "reason": "Pest activity detected with {severity} severity"
+        },
+        "disease": {
+            "action": "Isolate plant and treat for disease",
+            "urgency": "immediate",
+            "reason": "Disease can spread to nearby plants"
+        },
+        "water_stress": {
+            "action": "Adjust watering schedule",
+            "urgency": "within_week",
+            "reason": "Water stress detected"
+        },
+        "nutrient_deficiency": {
+            "action": "Consider fertilizer application",
+            "urgency": "within_week",
+            "reason": "Signs of nutrient deficiency"
+        }
+    }
+    
     def __init__(self):
         """Initialize the health assessor, sharing model with PlantClassifier if possible."""
         if PlantHealthAssessor._model is None:
@@ -94,23 +176,24 @@ class PlantHealthAssessor:
         try:
             from game_utils.plant_classifier import PlantClassifier
             if PlantClassifier._model is not None:
-                print("Sharing BioCLIP model with PlantClassifier (already loaded)...")
+                logger.info("Sharing BioCLIP model with PlantClassifier (already loaded)...")
                 PlantHealthAssessor._model = PlantClassifier._model
                 PlantHealthAssessor._preprocess = PlantClassifier._preprocess
                 PlantHealthAssessor._tokenizer = PlantClassifier._tokenizer
                 PlantHealthAssessor._device = PlantClassifier._device
-                print("BioCLIP model shared successfully!")
+                logger.info("BioCLIP model shared successfully!")
+                self._precompute_text_features()
                 return
         except (ImportError, AttributeError):
             # PlantClassifier not available or not loaded yet, continue with own load
             pass
         
         # Load BioCLIP model if not sharing
-        print("Loading BioCLIP model for health assessment...")
+        logger.info("Loading BioCLIP model for health assessment...")
         
         # Setup device
         PlantHealthAssessor._device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Using device: {PlantHealthAssessor._device}")
+        logger.info("Using device: %s", PlantHealthAssessor._device)
         
         # Load BioCLIP
         model, _, preprocess_val = open_clip.create_model_and_transforms('hf-hub:imageomics/bioclip')
@@ -122,46 +205,70 @@ class PlantHealthAssessor:
         # Enable FP16 for faster inference on GPU
         if PlantHealthAssessor._device == "cuda":
             model = model.half()
+        elif os.getenv("BIOCLIP_CPU_INT8", "0") == "1":
+            # INT8 dynamic quantization of the vision tower's Linear layers for faster CPU
+            # image encoding (the text tower runs once at startup and stays FP32)
+            model.visual = torch.ao.quantization.quantize_dynamic(model.visual, {torch.nn.Linear}, dtype=torch.qint8)
+        
+        # Optionally compile the vision encoder (BIOCLIP_COMPILE=1)
+        compile_image_encoder(model, PlantHealthAssessor._device)
         
         # Store in class variables
         PlantHealthAssessor._model = model
         PlantHealthAssessor._preprocess = preprocess_val
         PlantHealthAssessor._tokenizer = tokenizer
         
-        print("BioCLIP model loaded for health assessment!")
+        logger.info("BioCLIP model loaded for health assessment!")
+        
+        self._precompute_text_features()
     
-    def _classify_image_with_texts(self, image: bytes, text_descriptions: List[str]) -> List[Tuple[str, float]]:
+    def _precompute_text_features(self):
+        """Tokenize and encode the static health and issue descriptions once."""
+        PlantHealthAssessor._health_text_features = self._encode_texts(self._HEALTH_TEXTS)
+        PlantHealthAssessor._issue_text_features = self._encode_texts(self._ISSUE_TEXTS)
+        
+        logger.info("Health description text features precomputed and cached!")
+    
+    def _encode_texts(self, text_descriptions: List[str]) -> torch.Tensor:
+        """Encode text descriptions into normalized BioCLIP text features."""
+        text = PlantHealthAssessor._tokenizer(text_descriptions).to(PlantHealthAssessor._device)
+        
+        with torch.inference_mode():
+            text_features = PlantHealthAssessor._model.encode_text(text)
+            text_features /= text_features.norm(dim=-1, keepdim=True)
+            
+            if PlantHealthAssessor._device == "cuda":
+                text_features = text_features.half()
+        
+        return text_features
+    
+    def _encode_image(self, image: bytes) -> torch.Tensor:
         """
-        Classify an image against a list of text descriptions.
+        Encode an image into normalized BioCLIP image features.
         
         Args:
             image: Image bytes
-            text_descriptions: List of text descriptions to match against
+            
+        Returns:
+            1 x D tensor of image features
+        """
+        return encode_image(image, self.model, self.preprocess, self.device)
+    
+    def _classify_image_with_texts(self, image_features: torch.Tensor, text_features: torch.Tensor, text_descriptions: List[str]) -> List[Tuple[str, float]]:
+        """
+        Classify encoded image features against precomputed text description features.
+        
+        Args:
+            image_features: Normalized image features from _encode_image
+            text_features: Normalized text features, one row per description
+            text_descriptions: Descriptions matching the rows of text_features
             
         Returns:
             List of (description, probability) tuples sorted by probability
         """
         try:
-            # Load image from bytes
-            pil_image = Image.open(io.BytesIO(image)).convert('RGB')
-            
-            # Preprocess image
-            image_tensor = self.preprocess(pil_image).unsqueeze(0).to(self.device)
-            
-            if self.device == "cuda":
-                image_tensor = image_tensor.half()
-            
-            # Tokenize text descriptions
-            text = self.tokenizer(text_descriptions).to(self.device)
-            
             # Get similarity scores
-            with torch.no_grad():
-                image_features = self.model.encode_image(image_tensor)
-                text_features = self.model.encode_text(text)
-                
-                image_features /= image_features.norm(dim=-1, keepdim=True)
-                text_features /= text_features.norm(dim=-1, keepdim=True)
-                
+            with torch.inference_mode():
                 similarity = (100.0 * image_features @ text_features.T).softmax(dim=-1)
             
             # Get probabilities
@@ -174,10 +281,10 @@ class PlantHealthAssessor:
             return results
             
         except Exception as e:
-            print(f"Error in image classification: {str(e)}")
+            logger.error("Error in image classification: %s", e)
             raise
     
-    def assess_plant_health(self, image: bytes, plant_name: str, location: str = "") -> Dict:
+    def assess_plant_health(self, image: bytes, plant_name: str, location: str = "", image_features: Optional[torch.Tensor] = None) -> HealthAssessment:
         """
         Assess the health of a plant from an image using BioCLIP.
         
@@ -185,22 +292,24 @@ class PlantHealthAssessor:
             image: Image bytes to analyze
             plant_name: Scientific name of the plant
             location: Optional location information
+            image_features: Optional precomputed image features (e.g. from PlantClassifier.encode_image)
+                            to skip encoding the image again
             
         Returns:
-            Dictionary containing health assessment
+            HealthAssessment (use to_dict() to serialize)
         """
         try:
-            print(f"Assessing health of {plant_name} using BioCLIP...")
+            logger.debug("Assessing health of %s using BioCLIP...", plant_name)
             
-            # Step 1: Determine overall health status
-            health_texts = []
-            health_status_map = {}
-            for status, descriptions in self.HEALTH_CATEGORIES.items():
-                for desc in descriptions:
-                    health_texts.append(desc)
-                    health_status_map[desc] = status
+            # Encode the image once; both classifications below reuse the features
+            if image_features is None:
+                image_features = self._encode_image(image)
             
-            health_results = self._classify_image_with_texts(image, health_texts)
+            # Step 1: Determine overall health status
+            health_status_map = self._HEALTH_STATUS_MAP
+            health_results = self._classify_image_with_texts(
+                image_features, PlantHealthAssessor._health_text_features, self._HEALTH_TEXTS
+            )
             
             # Get the top health category
             top_health_desc, top_health_prob = health_results[0]
@@ -212,31 +321,30 @@ class PlantHealthAssessor:
                 status = health_status_map[desc]
                 status_probs[status] = status_probs.get(status, 0) + prob
             
-            # Step 2: Check for specific issues ONLY if plant is not healthy
+            # Healthy plants (the common case) skip issue detection and the report builders
+            if overall_status == "healthy":
+                health_score = self._calculate_health_score(status_probs, overall_status)
+                return self._fast_healthy_response(status_probs, health_score)
+            
+            # Step 2: Check for specific issues (plant is not healthy)
             detected_issues = []
+            issue_category_map = self._ISSUE_CATEGORY_MAP
+            issue_results = self._classify_image_with_texts(
+                image_features, PlantHealthAssessor._issue_text_features, self._ISSUE_TEXTS
+            )
             
-            # Only detect specific issues if the plant has problems
-            if overall_status != "healthy":
-                issue_texts = []
-                issue_category_map = {}
-                for category, descriptions in self.ISSUE_CATEGORIES.items():
-                    for desc in descriptions:
-                        issue_texts.append(desc)
-                        issue_category_map[desc] = category
-                
-                issue_results = self._classify_image_with_texts(image, issue_texts)
-                
-                # Identify issues with probability > threshold
-                issue_threshold = 0.15  # If any issue has >15% probability, flag it
-                for desc, prob in issue_results:
-                    if prob > issue_threshold:
-                        category = issue_category_map[desc]
-                        detected_issues.append({
-                            "issue": category.replace("_", " ").title(),
-                            "severity": self._determine_severity(prob),
-                            "confidence": prob,
-                            "description": desc
-                        })
+            # Identify issues with probability > threshold
+            issue_threshold = 0.15  # If any issue has >15% probability, flag it
+            for desc, prob in issue_results:
+                if prob > issue_threshold:
+                    category = issue_category_map[desc]
+                    detected_issues.append({
+                        "issue": category.replace("_", " ").title(),
+                        "category": category,
+                        "severity": self._determine_severity(prob),
+                        "confidence": prob,
+                        "description": desc
+                    })
             
             # Step 3: Calculate health score (0-100)
             health_score = self._calculate_health_score(status_probs, overall_status)
@@ -257,28 +365,53 @@ class PlantHealthAssessor:
             # Determine overall confidence
             confidence = float(max(status_probs.values()))
             
-            return {
-                "success": True,
-                "overall_status": self._map_status_to_simple(overall_status),
-                "health_score": health_score,
-                "confidence": confidence,
-                "visual_observations": visual_observations,
-                "issues_detected": detected_issues,
-                "positive_indicators": positive_indicators,
-                "recommended_actions": recommended_actions,
-                "monitoring_notes": monitoring_notes,
-                "raw_health_probabilities": status_probs
-            }
+            return HealthAssessment(
+                success=True,
+                overall_status=self._map_status_to_simple(overall_status),
+                health_score=health_score,
+                confidence=confidence,
+                visual_observations=visual_observations,
+                issues_detected=detected_issues,
+                positive_indicators=positive_indicators,
+                recommended_actions=recommended_actions,
+                monitoring_notes=monitoring_notes,
+                raw_health_probabilities=status_probs,
+                error=None
+            )
             
         except Exception as e:
-            print(f"Error assessing plant health: {str(e)}")
-            return {
-                "success": False,
-                "error": f"Error assessing plant health: {str(e)}",
-                "overall_status": "unknown",
-                "health_score": 0,
-                "confidence": 0.0
-            }
+            logger.error("Error assessing plant health: %s", e)
+            return HealthAssessment.failed(f"Error assessing plant health: {str(e)}")
+    
+    def _fast_healthy_response(self, status_probs: Dict[str, float], health_score: int) -> HealthAssessment:
+        """
+        Build the assessment for a healthy plant directly, without issue detection.
+        Produces the same result the full path would for a healthy plant with no issues.
+        """
+        positive_indicators = ["No critical health issues detected", "Plant showing resilience"]
+        if status_probs.get("healthy", 0) > 0.2:
+            positive_indicators.insert(0, "Good overall plant structure maintained")
+        
+        return HealthAssessment(
+            success=True,
+            overall_status="healthy",
+            health_score=health_score,
+            confidence=float(max(status_probs.values())),
+            visual_observations=[
+                "Plant appears vibrant with good coloration",
+                "Leaves show healthy texture and structure"
+            ],
+            issues_detected=[],
+            positive_indicators=positive_indicators,
+            recommended_actions=[{
+                "action": "Continue current care routine",
+                "urgency": "routine",
+                "reason": "Plant is healthy and thriving"
+            }],
+            monitoring_notes="Continue regular monitoring schedule. Watch for any changes in leaf color or texture.",
+            raw_health_probabilities=status_probs,
+            error=None
+        )
     
     def _map_status_to_simple(self, status: str) -> str:
         """Map detailed status to simple categories."""
@@ -390,30 +523,15 @@ class PlantHealthAssessor:
         
         # Add issue-specific actions
         for issue in issues[:3]:
-            if "pest" in issue['issue'].lower():
-                actions.append({
-                    "action": "Inspect for pests and apply appropriate treatment",
-                    "urgency": "within_week" if issue['severity'] != "severe" else "immediate",
-                    "reason": f"Pest activity detected with {issue['severity']} severity"
-                })
-            elif "disease" in issue['issue'].lower():
-                actions.append({
-                    "action": "Isolate plant and treat for disease",
-                    "urgency": "immediate",
-                    "reason": "Disease can spread to nearby plants"
-                })
-            elif "water" in issue['issue'].lower():
-                actions.append({
-                    "action": "Adjust watering schedule",
-                    "urgency": "within_week",
-                    "reason": "Water stress detected"
-                })
-            elif "nutrient" in issue['issue'].lower():
-                actions.append({
-                    "action": "Consider fertilizer application",
-                    "urgency": "within_week",
-                    "reason": "Signs of nutrient deficiency"
-                })
+            template = self._ISSUE_ACTIONS.get(issue["category"])
+            if template is None:
+                continue
+            severe = issue["severity"] == "severe"
+            actions.append({
+                "action": template["action"],
+                "urgency": template.get("severe_urgency", template["urgency"]) if severe else template["urgency"],
+                "reason": template["reason"].format(severity=issue["severity"])
+            })
         
         return actions
     
@@ -428,21 +546,21 @@ class PlantHealthAssessor:
         else:
             return "Monitor multiple times daily. Track response to interventions."
     
-    def format_health_summary(self, assessment: Dict) -> str:
+    def format_health_summary(self, assessment: HealthAssessment) -> str:
         """
         Format a health assessment into a human-readable summary.
         
         Args:
-            assessment: Health assessment dictionary
+            assessment: HealthAssessment from assess_plant_health
             
         Returns:
             Formatted string summary
         """
-        if not assessment.get("success"):
+        if not assessment.success:
             return "Health assessment unavailable"
         
-        status = assessment.get("overall_status", "unknown").upper()
-        score = assessment.get("health_score", 0)
+        status = assessment.overall_status.upper()
+        score = assessment.health_score
         
         summary_parts = [
             f"Status: {status} (Score: {score}/100)",
@@ -451,11 +569,11 @@ class PlantHealthAssessor:
         ]
         
         # Add visual observations
-        for obs in assessment.get("visual_observations", []):
+        for obs in assessment.visual_observations:
             summary_parts.append(f"  • {obs}")
         
         # Add issues if any
-        issues = assessment.get("issues_detected", [])
+        issues = assessment.issues_detected
         if issues:
             summary_parts.append("\nIssues Detected:")
             for issue in issues:
@@ -464,7 +582,7 @@ class PlantHealthAssessor:
                 )
         
         # Add recommended actions
-        actions = assessment.get("recommended_actions", [])
+        actions = assessment.recommended_actions
         if actions:
             summary_parts.append("\nRecommended Actions:")
             for action in actions[:3]:  # Top 3 actions
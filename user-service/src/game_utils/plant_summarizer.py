@@ -1,10 +1,108 @@
+import asyncio
+import hashlib
+import logging
 import os
-import requests
-from tavily import TavilyClient
+import threading
+import httpx
+import orjson
+from tavily import AsyncTavilyClient
 from dotenv import load_dotenv
+from game_utils.adaptive_limiter import AdaptiveLimiter
+from game_utils.response_cache import get_response_cache
+from settings import get_settings
+from http_clients import http2_available
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+# Module-level singleton instance
+_plant_summarizer = None
+_plant_summarizer_lock = threading.Lock()
+
+
+def get_plant_summarizer():
+    """
+    Get the shared PlantSummarizer instance (singleton pattern).
+    Creation is locked so concurrent first requests (run in worker threads) create only one.
+    """
+    global _plant_summarizer
+    if _plant_summarizer is None:
+        with _plant_summarizer_lock:
+            if _plant_summarizer is None:
+                _plant_summarizer = PlantSummarizer()
+    return _plant_summarizer
+
+
+async def close_plant_summarizer():
+    """Close the shared PlantSummarizer's HTTP connections, if it was created."""
+    global _plant_summarizer
+    with _plant_summarizer_lock:
+        plant_summarizer, _plant_summarizer = _plant_summarizer, None
+    if plant_summarizer is not None:
+        await plant_summarizer.aclose()
+
+
+# Prompt templates and system messages, built once and filled in with str.format per request
+_SUMMARY_TEMPLATE = """Based on the following information about {plant}, provide a comprehensive but concise summary covering:
+        - Basic description and characteristics
+        - Growing conditions (light, water, soil)
+        - Care requirements
+
+        Information:
+        {context}
+
+        Please provide a clear, informative summary of the plant for users in a botanical garden to help them learn more about it."""
+
+_FOLLOW_UP_TEMPLATE = """Based on the following information about {plant}, provide a clear and helpful answer to this question: {question}
+
+        Information:
+        {context}
+
+        Please provide an accurate, informative response that directly addresses the user's question."""
+
+_FOLLOW_UP_BATCH_TEMPLATE = """Based on the information provided about {plant}, provide a clear and helpful answer to each of the following questions.
+        Each question was asked independently, so answer each one on its own.
+
+        {numbered}
+
+        Respond with a JSON object of the form {{"answers": ["answer to question 0", "answer to question 1", ...]}} with exactly {count} answers in question order."""
+
+_SUMMARY_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful botanical expert who provides clear, accurate plant information."
+}
+
+_FOLLOW_UP_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful botanical expert who answers questions about plants clearly and accurately."
+}
+
+
+def _normalize(text):
+    """Normalize a plant name or question for cache keys: case, surrounding punctuation and whitespace are ignored."""
+    return " ".join(text.split()).strip("?!. ").casefold()
+
+
+# Token encoder for sizing the search context (tiktoken is optional); False once loading failed
+_token_encoder = None
+
+
+def _count_tokens(text):
+    """Count tokens with tiktoken if available, otherwise estimate ~4 characters per token."""
+    global _token_encoder
+    if _token_encoder is None:
+        try:
+            import tiktoken
+            _token_encoder = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _token_encoder = False
+    if _token_encoder:
+        return len(_token_encoder.encode(text))
+    return len(text) // 4 + 1
+
+
 class PlantSummarizer:
     def __init__(self, tavily_api_key=None, openai_api_key=None):
         """
@@ -18,8 +116,9 @@ class PlantSummarizer:
             ValueError: If required environment variables are not set
         """
         # Get API keys from parameters or environment variables
-        tavily_key = tavily_api_key or os.getenv("TAVILY_API_KEY")
-        openai_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+        settings = get_settings()
+        tavily_key = tavily_api_key or settings.tavily_api_key
+        openai_key = openai_api_key or settings.openai_api_key
         
         # Validate required environment variables
         if not tavily_key:
@@ -27,16 +126,164 @@ class PlantSummarizer:
         if not openai_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set. Please set it in your .env file.")
         
-        self.tavily_client = TavilyClient(api_key=tavily_key)
+        # The Tavily client uses a pooled httpx client owned here, so warm_up() can open
+        # its connection and aclose() can close it
+        self._tavily_http = httpx.AsyncClient(base_url="https://api.tavily.com", timeout=60)
+        self.tavily_client = AsyncTavilyClient(api_key=tavily_key, client=self._tavily_http)
         self.api_key = openai_key
         self.api_url = "https://api.openai.com/v1/chat/completions"
+        
+        # Tavily results and OpenAI answers are cached per (plant, question, model, max_tokens)
+        self.cache = get_response_cache()
+        
+        # One pooled keep-alive client for all OpenAI calls, so requests reuse
+        # TLS connections instead of opening a new one each time. Auth headers are
+        # set once on the client and failed connection attempts are retried.
+        # HTTP/2 is used when the h2 package is installed.
+        self._http = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                http2=http2_available(),
+                retries=2,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+            ),
+            timeout=30,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
+        )
+        
+        # Caps concurrent OpenAI requests at OPENAI_MAX_CONCURRENCY, shrinking the cap
+        # when OpenAI rate-limits us and growing it back while request budget remains
+        self._limiter = AdaptiveLimiter(max_limit=int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")))
+
+    # Search context limits: characters kept per result and total tokens sent to OpenAI
+    MAX_RESULT_CHARS = 1200
+    MAX_CONTEXT_TOKENS = 2500
+
+    # OpenAI responses worth retrying, and retry count / base backoff (seconds)
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    MAX_RETRIES = 2
+    BACKOFF_FACTOR = 0.1
+
+    async def _post_chat(self, payload):
+        """
+        Send a chat completion request and return the response text.
+        Retries rate-limited and 5xx responses with exponential backoff (or the
+        Retry-After period OpenAI asks for, if longer).
+        Bodies are encoded and decoded with orjson (Content-Type is set on the client).
+        """
+        body = orjson.dumps(payload)
+        for attempt in range(self.MAX_RETRIES + 1):
+            async with self._limiter:
+                response = await self._http.post(self.api_url, content=body)
+                retry_after = self._limiter.update(response)
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.MAX_RETRIES:
+                break
+            await asyncio.sleep(max(self.BACKOFF_FACTOR * (2 ** attempt), retry_after or 0))
+        
+        response.raise_for_status()
+        result = orjson.loads(response.content)
+        return result['choices'][0]['message']['content']
+
+    async def _stream_chat(self, payload):
+        """
+        Send a streaming chat completion request and yield the content deltas as they arrive.
+        Rate-limited and 5xx responses are retried before any content has been yielded.
+        """
+        body = orjson.dumps({**payload, "stream": True})
+        for attempt in range(self.MAX_RETRIES + 1):
+            async with self._limiter, self._http.stream("POST", self.api_url, content=body) as response:
+                retry_after = self._limiter.update(response)
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.MAX_RETRIES:
+                    if response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+                    
+                    # Server-sent events: "data: {json}" lines, terminated by "data: [DONE]"
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            return
+                        choices = orjson.loads(data).get("choices") or []
+                        content = choices[0].get("delta", {}).get("content") if choices else None
+                        if content:
+                            yield content
+                    return
+            # Back off outside the limiter so the slot is free while waiting
+            await asyncio.sleep(max(self.BACKOFF_FACTOR * (2 ** attempt), retry_after or 0))
+
+    async def warm_up(self, timeout=5.0):
+        """
+        Open the OpenAI and Tavily connections ahead of the first request, so it doesn't
+        pay for DNS, TCP and TLS setup. Failures are logged and otherwise ignored.
+        """
+        requests = {
+            "OpenAI": self._http.get("https://api.openai.com/v1/models", timeout=timeout),
+            "Tavily": self._tavily_http.head("/", timeout=timeout),
+        }
+        
+        results = await asyncio.gather(*requests.values(), return_exceptions=True)
+        for name, result in zip(requests, results):
+            if isinstance(result, Exception):
+                logger.warning("Could not warm up %s connection: %s", name, result)
+
+    async def aclose(self):
+        """
+        Close the HTTP connections held by the OpenAI and Tavily clients.
+        The response cache is shared and is closed by close_response_cache().
+        """
+        await self._http.aclose()
+        await self._tavily_http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def _search(self, query):
+        """Run a Tavily search, reusing a cached result for the same query."""
+        key = self.cache.make_key("tavily", query)
+        search_results = await self.cache.aget(key)
+        if search_results is None:
+            search_results = await self.tavily_client.search(
+                query=query,
+                search_depth="advanced",
+                max_results=5
+            )
+            await self.cache.aset(key, search_results)
+        return search_results
+
+    async def precompute_summaries(self, plants, concurrency=4):
+        """
+        Summarize every plant in plants (skipping cached ones) so the first in-game
+        summary request is served from the cache.
+        
+        Args:
+            plants: Plant names to summarize
+            concurrency: Maximum number of summaries generated at once
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _summarize(plant):
+            async with semaphore:
+                try:
+                    await self.summarize(plant)
+                except Exception as e:
+                    logger.warning("Error precomputing summary for %s: %s", plant, e)
+        
+        await asyncio.gather(*(_summarize(plant) for plant in plants))
+        logger.info("Precomputed summaries for %s plants", len(plants))
 
 
     """
     WHEN THE USER GETS THE PLANT NAME CORRECTLY, THEN WE WILL GET THE SUMMARY OF THE PLANT.
     """
         
-    def summarize(self, plant, model="gpt-4o-mini", max_tokens=500):
+    async def summarize(self, plant, model="gpt-4o-mini", max_tokens=500):
         """
         Get a summary of a plant using Tavily search and OpenAI.
         
@@ -48,81 +295,109 @@ class PlantSummarizer:
         Returns:
             str: Summary of the plant
         """
+        key = self.cache.make_key("summary", _normalize(plant), model, max_tokens)
+        summary = await self.cache.aget(key)
+        if summary is not None:
+            return summary
+        
         # Search for plant information using Tavily
         search_query = f"{plant} plant information for fun and learning purposes"
-        search_results = self.tavily_client.search(
-            query=search_query,
-            search_depth="advanced",
-            max_results=5
-        )
+        search_results = await self._search(search_query)
         
         # Extract relevant content from search results
         context = self._extract_context(search_results)
         
         # Generate summary using OpenAI
-        summary = self._generate_summary(plant, context, model, max_tokens)
+        summary = await self._generate_summary(plant, context, model, max_tokens)
         
+        await self.cache.aset(key, summary)
         return summary
     
+    async def summarize_stream(self, plant, model="gpt-4o-mini", max_tokens=500):
+        """
+        Stream a summary of a plant, yielding text chunks as OpenAI generates them.
+        A cached summary is yielded as a single chunk; a completed stream is cached.
+        
+        Args:
+            plant: Name of the plant to summarize
+            model: OpenAI model to use
+            max_tokens: Maximum tokens in the summary
+            
+        Yields:
+            str: Chunks of the summary
+        """
+        key = self.cache.make_key("summary", _normalize(plant), model, max_tokens)
+        summary = await self.cache.aget(key)
+        if summary is not None:
+            yield summary
+            return
+        
+        search_results = await self._search(f"{plant} plant information for fun and learning purposes")
+        context = self._extract_context(search_results)
+        
+        chunks = []
+        async for chunk in self._stream_chat(self._summary_payload(plant, context, model, max_tokens)):
+            chunks.append(chunk)
+            yield chunk
+        await self.cache.aset(key, "".join(chunks))
+    
     def _extract_context(self, search_results):
-        """Extract and combine relevant content from Tavily search results."""
+        """
+        Extract and combine relevant content from Tavily search results.
+        Each result is truncated to MAX_RESULT_CHARS, empty and near-duplicate results
+        (same opening text) are dropped, and results stop being added once the context
+        would exceed MAX_CONTEXT_TOKENS.
+        """
         context_parts = []
+        seen = set()
+        total_tokens = 0
         
         for result in search_results.get('results', []):
             title = result.get('title', '')
-            content = result.get('content', '')
-            context_parts.append(f"{title}: {content}")
+            content = (result.get('content') or '').strip()[:self.MAX_RESULT_CHARS]
+            if not content:
+                continue
+            
+            fingerprint = hashlib.blake2b(content[:256].encode('utf-8'), digest_size=16).digest()
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            
+            part = f"{title}: {content}" if title else content
+            part_tokens = _count_tokens(part)
+            if context_parts and total_tokens + part_tokens > self.MAX_CONTEXT_TOKENS:
+                break
+            context_parts.append(part)
+            total_tokens += part_tokens
         
         return "\n\n".join(context_parts)
     
-    def _generate_summary(self, plant, context, model, max_tokens):
+    async def _generate_summary(self, plant, context, model, max_tokens):
         """Generate a plant summary using OpenAI."""
-        prompt = f"""Based on the following information about {plant}, provide a comprehensive but concise summary covering:
-        - Basic description and characteristics
-        - Growing conditions (light, water, soil)
-        - Care requirements
+        return await self._post_chat(self._summary_payload(plant, context, model, max_tokens))
 
-        Information:
-        {context}
-
-        Please provide a clear, informative summary of the plant for users in a botanical garden to help them learn more about it."""
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
+    def _summary_payload(self, plant, context, model, max_tokens):
+        """Build the OpenAI chat request for a plant summary."""
         payload = {
             "model": model,
             "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a helpful botanical expert who provides clear, accurate plant information."
-                },
+                _SUMMARY_SYSTEM_MESSAGE,
                 {
                     "role": "user",
-                    "content": prompt
+                    "content": _SUMMARY_TEMPLATE.format(plant=plant, context=context)
                 }
             ],
             "max_tokens": max_tokens,
             "temperature": 0.7
         }
         
-        response = requests.post(
-            self.api_url,
-            headers=headers,
-            json=payload
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result['choices'][0]['message']['content']
+        return payload
 
     """
     WHEN THE USER ASKS A FOLLOW UP QUESTION
     """
     
-    def follow_up_question(self, plant, question, model="gpt-4o-mini", max_tokens=500):
+    async def follow_up_question(self, plant, question, model="gpt-4o-mini", max_tokens=500):
         """
         Answer a follow-up question about a plant using Tavily search and OpenAI.
         
@@ -135,58 +410,132 @@ class PlantSummarizer:
         Returns:
             str: Answer to the user's question
         """
-        # Search for information related to the specific question
-        search_query = f"{plant} {question}"
-        search_results = self.tavily_client.search(
-            query=search_query,
-            search_depth="advanced",
-            max_results=5
-        )
+        answers = await self.follow_up_questions(plant, [question], model, max_tokens)
+        return answers[0]
+    
+    async def follow_up_stream(self, plant, question, model="gpt-4o-mini", max_tokens=500):
+        """
+        Stream the answer to a follow-up question, yielding text chunks as OpenAI generates them.
+        A cached answer is yielded as a single chunk; a completed stream is cached.
         
-        # Extract relevant context
+        Args:
+            plant: Name of the plant
+            question: User's question about the plant
+            model: OpenAI model to use
+            max_tokens: Maximum tokens in the response
+            
+        Yields:
+            str: Chunks of the answer
+        """
+        key = self.cache.make_key("follow_up", _normalize(plant), _normalize(question), model, max_tokens)
+        answer = await self.cache.aget(key)
+        if answer is not None:
+            yield answer
+            return
+        
+        search_results = await self._search(f"{plant} {question}")
         context = self._extract_context(search_results)
         
-        # Generate answer using OpenAI
-        answer = self._generate_follow_up_answer(plant, question, context, model, max_tokens)
+        chunks = []
+        async for chunk in self._stream_chat(self._follow_up_payload(plant, question, context, model, max_tokens)):
+            chunks.append(chunk)
+            yield chunk
+        await self.cache.aset(key, "".join(chunks))
+    
+    async def follow_up_questions(self, plant, questions, model="gpt-4o-mini", max_tokens=500):
+        """
+        Answer several follow-up questions about the same plant.
+        The Tavily searches run concurrently and all questions are answered by a single
+        OpenAI request.
+        
+        Args:
+            plant: Name of the plant
+            questions: List of questions about the plant
+            model: OpenAI model to use (e.g., "gpt-4o-mini", "gpt-4o")
+            max_tokens: Maximum tokens per answer
+            
+        Returns:
+            list[str]: One answer per question, in the same order
+        """
+        # Serve cached answers; only the remaining questions go to Tavily/OpenAI
+        keys = [self.cache.make_key("follow_up", _normalize(plant), _normalize(question), model, max_tokens) for question in questions]
+        answers = [await self.cache.aget(key) for key in keys]
+        missing = [i for i, answer in enumerate(answers) if answer is None]
+        if not missing:
+            return answers
         
-        return answer
+        new_answers = await self._answer_follow_up_questions(plant, [questions[i] for i in missing], model, max_tokens)
+        for i, answer in zip(missing, new_answers):
+            answers[i] = answer
+            await self.cache.aset(keys[i], answer)
+        return answers
     
-    def _generate_follow_up_answer(self, plant, question, context, model, max_tokens):
-        """Generate an answer to a follow-up question using OpenAI."""
-        prompt = f"""Based on the following information about {plant}, provide a clear and helpful answer to this question: {question}
-
-        Information:
-        {context}
-
-        Please provide an accurate, informative response that directly addresses the user's question."""
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+    async def _answer_follow_up_questions(self, plant, questions, model, max_tokens):
+        """Search for and answer follow-up questions that are not cached."""
+        # Search for information related to each question concurrently
+        search_results = await asyncio.gather(*(
+            self._search(f"{plant} {question}") for question in questions
+        ))
         
+        # Extract relevant context
+        contexts = [self._extract_context(results) for results in search_results]
+        
+        # Generate answers using OpenAI
+        if len(questions) == 1:
+            return [await self._generate_follow_up_answer(plant, questions[0], contexts[0], model, max_tokens)]
+        
+        try:
+            return await self._generate_follow_up_answers(plant, questions, contexts, model, max_tokens)
+        except (ValueError, KeyError, TypeError) as e:
+            # The batched response could not be parsed; answer each question on its own
+            logger.warning("Batched follow-up answer failed, answering individually: %s", e)
+            return list(await asyncio.gather(*(
+                self._generate_follow_up_answer(plant, question, context, model, max_tokens)
+                for question, context in zip(questions, contexts)
+            )))
+    
+    async def _generate_follow_up_answers(self, plant, questions, contexts, model, max_tokens):
+        """Answer several follow-up questions with one OpenAI request returning a JSON list."""
+        numbered = "\n\n".join(
+            f"Question {i}: {question}\nInformation:\n{context}"
+            for i, (question, context) in enumerate(zip(questions, contexts))
+        )
         payload = {
             "model": model,
             "messages": [
+                _FOLLOW_UP_SYSTEM_MESSAGE,
                 {
-                    "role": "system",
-                    "content": "You are a helpful botanical expert who answers questions about plants clearly and accurately."
-                },
+                    "role": "user",
+                    "content": _FOLLOW_UP_BATCH_TEMPLATE.format(plant=plant, numbered=numbered, count=len(questions))
+                }
+            ],
+            "max_tokens": max_tokens * len(questions),
+            "temperature": 0.7,
+            "response_format": {"type": "json_object"}
+        }
+        
+        answers = orjson.loads(await self._post_chat(payload))["answers"]
+        if len(answers) != len(questions):
+            raise ValueError(f"Expected {len(questions)} answers, got {len(answers)}")
+        return [str(answer) for answer in answers]
+    
+    async def _generate_follow_up_answer(self, plant, question, context, model, max_tokens):
+        """Generate an answer to a follow-up question using OpenAI."""
+        return await self._post_chat(self._follow_up_payload(plant, question, context, model, max_tokens))
+
+    def _follow_up_payload(self, plant, question, context, model, max_tokens):
+        """Build the OpenAI chat request for a follow-up question."""
+        payload = {
+            "model": model,
+            "messages": [
+                _FOLLOW_UP_SYSTEM_MESSAGE,
                 {
                     "role": "user",
-                    "content": prompt
+                    "content": _FOLLOW_UP_TEMPLATE.format(plant=plant, question=question, context=context)
                 }
             ],
             "max_tokens": max_tokens,
             "temperature": 0.7
         }
         
-        response = requests.post(
-            self.api_url,
-            headers=headers,
-            json=payload
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result['choices'][0]['message']['content']
\ No newline at end of file
+        return payload
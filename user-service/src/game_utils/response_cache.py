@@ -0,0 +1,120 @@
+"""
+Response cache for PlantSummarizer.
+Keeps recent Tavily results and OpenAI answers in an in-process LRU and, if
+SUMMARY_CACHE_DIR is set and diskcache is installed, persists them on disk so
+they survive restarts.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """In-process LRU cache with an optional on-disk backing store."""
+
+    def __init__(self, maxsize: int = 1024, cache_dir: Optional[str] = None):
+        """
+        Create the cache.
+
+        Args:
+            maxsize: Maximum number of entries kept in memory
+            cache_dir: Directory for the on-disk cache (requires diskcache); None for memory only
+        """
+        self._maxsize = maxsize
+        self._memory = OrderedDict()
+        self._disk = None
+
+        if cache_dir:
+            try:
+                import diskcache
+                self._disk = diskcache.Cache(cache_dir)
+                logger.info("Summary cache persisted to %s", cache_dir)
+            except ImportError:
+                logger.warning("diskcache not installed, summary cache is in-memory only")
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a cache key from the parts identifying a request (SHA-256 of their JSON)."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if it is not cached."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        if self._disk is not None:
+            value = self._disk.get(key)
+            if value is not None:
+                self._remember(key, value)
+            return value
+        return None
+
+    def set(self, key: str, value: Any):
+        """Cache a value in memory and (if enabled) on disk."""
+        self._remember(key, value)
+        if self._disk is not None:
+            self._disk.set(key, value)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Like get(), for use on the event loop: a disk lookup runs in a worker thread."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        if self._disk is not None:
+            value = await asyncio.to_thread(self._disk.get, key)
+            if value is not None:
+                self._remember(key, value)
+            return value
+        return None
+
+    async def aset(self, key: str, value: Any):
+        """Like set(), for use on the event loop: the disk write runs in a worker thread."""
+        self._remember(key, value)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, value)
+
+    def _remember(self, key: str, value: Any):
+        """Store a value in the in-memory LRU, evicting the oldest entry if full."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._maxsize:
+            self._memory.popitem(last=False)
+
+    def close(self):
+        """Close the on-disk cache, if any."""
+        if self._disk is not None:
+            self._disk.close()
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the shared ResponseCache instance.
+    Creation is locked so concurrent first requests (run in worker threads) create only one.
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(cache_dir=os.getenv("SUMMARY_CACHE_DIR") or None)
+    return _response_cache
+
+
+def close_response_cache():
+    """Close the shared ResponseCache's on-disk store, if it was created."""
+    global _response_cache
+    with _response_cache_lock:
+        response_cache, _response_cache = _response_cache, None
+    if response_cache is not None:
+        response_cache.close()
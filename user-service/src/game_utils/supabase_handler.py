@@ -1,3 +1,5 @@
+import threading
+import time
 from typing import Optional, Dict
 from services.plant_service import PlantService
 from services.image_service import ImageService
@@ -9,12 +11,55 @@ class SupabaseHandler:
     Uses services to interact with Supabase.
     """
 
+    # Seconds before cached plant data (lists, rows and ids) is reloaded
+    PLANT_LIST_TTL = 300
+
     def __init__(self):
         """
         Initialize the Supabase handler with services.
         """
         self.plant_service = PlantService()
         self.image_service = ImageService()
+        
+        # Plant rows only change through the admin service, which calls refresh()
+        # (through the /refresh-plants endpoint) after saving them. Every cached entry
+        # is stored as (loaded_at, value) and also expires after PLANT_LIST_TTL.
+        # Only found plants are cached. The (name, dome) -> id index is filled from
+        # whichever plant rows are loaded.
+        # Requests run in worker threads, so the caches are only changed under _lock.
+        # Database queries run outside the lock; a query that started before refresh()
+        # (i.e. in an older _generation) does not store its result.
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._all_plants = None
+        self._plants_by_dome = {}
+        self._plant_ids = {}
+        self._plant_cache = {}
+        self._plant_id_cache = {}
+
+    def refresh(self):
+        """Drop all cached plant data so the next lookups reload it from the database."""
+        with self._lock:
+            self._generation += 1
+            self._all_plants = None
+            self._plants_by_dome = {}
+            self._plant_ids = {}
+            self._plant_cache = {}
+            self._plant_id_cache = {}
+
+    def warm_up(self):
+        """
+        Open the pooled Supabase connection and load the plant list ahead of the first
+        request, so it doesn't pay for connection setup or a cold cache.
+        
+        Raises:
+            Exception: If the plant list cannot be loaded
+        """
+        self._load_all_plants()
+
+    def _is_fresh(self, entry: Optional[tuple]) -> bool:
+        """True if a (loaded_at, value) cache entry exists and has not expired."""
+        return entry is not None and time.monotonic() - entry[0] <= self.PLANT_LIST_TTL
 
     # PLANTS TABLE - USED FOR GETTING PLANTS BY SCIENTIFIC NAME
 
@@ -30,20 +75,90 @@ class SupabaseHandler:
         Returns:
             Plant dictionary or None if not found
         """
-        return self.plant_service.get_plant_by_scientific_name(scientific_name, dome)
+        key = (scientific_name, dome)
+        cached = self._plant_cache.get(key)
+        if not self._is_fresh(cached):
+            generation = self._generation
+            plant = self.plant_service.get_plant_by_scientific_name(scientific_name, dome)
+            if plant is None:
+                return None
+            cached = (time.monotonic(), plant)
+            with self._lock:
+                if generation == self._generation:
+                    self._plant_cache[key] = cached
+        return dict(cached[1])
 
     def get_all_plants_by_scientific_name(self) -> list[dict]:
         """
         Get all plants from the database by scientific name.
+        The plant list is cached for PLANT_LIST_TTL seconds.
         
         Returns:
             List of plant dictionaries
         """
-        return self.plant_service.get_all_plants_by_scientific_name()
+        return [dict(plant) for plant in self._load_all_plants()]
+
+    def get_plants_by_dome(self, dome: str) -> tuple[str, ...]:
+        """
+        Get the scientific names of the plants in a dome.
+        Only that dome's rows are fetched (filtered by the database); the names
+        are cached per dome for PLANT_LIST_TTL seconds as an immutable tuple, which
+        is returned as is instead of being copied.
+        
+        Args:
+            dome: Dome name
+            
+        Returns:
+            Tuple of scientific names (empty if the dome has no plants)
+        """
+        cached = self._plants_by_dome.get(dome)
+        if not self._is_fresh(cached):
+            generation = self._generation
+            plants = self.plant_service.get_plants_by_dome(dome)
+            cached = (time.monotonic(), tuple(plant["scientific_name"] for plant in plants))
+            with self._lock:
+                if generation == self._generation:
+                    self._plants_by_dome[dome] = cached
+                    self._index_plant_ids(plants, cached[0])
+        return cached[1]
+
+    def _load_all_plants(self) -> list[dict]:
+        """Return the cached plant list, reloading it once it expires."""
+        cached = self._all_plants
+        if not self._is_fresh(cached):
+            generation = self._generation
+            cached = (time.monotonic(), self.plant_service.get_all_plants_by_scientific_name())
+            with self._lock:
+                if generation == self._generation:
+                    self._all_plants = cached
+                    self._index_plant_ids(cached[1], cached[0])
+        return cached[1]
+
+    def _index_plant_ids(self, plants: list[dict], loaded_at: float):
+        """
+        Record the ids of freshly loaded plant rows in the (name, dome) -> id index
+        (first row wins). Must be called with _lock held.
+        """
+        plant_ids = {}
+        for plant in plants:
+            plant_ids.setdefault((plant["scientific_name"], plant.get("dome")), (loaded_at, plant["id"]))
+        self._plant_ids.update(plant_ids)
+
+    def get_all_scientific_names(self) -> list[str]:
+        """
+        Get the scientific names of all plants, ordered by name.
+        Lighter than get_all_plants_by_scientific_name when only the names are needed.
+        
+        Returns:
+            List of scientific names
+        """
+        return self.plant_service.get_all_scientific_names()
 
     def get_plant_id_by_scientific_name_and_dome(self, scientific_name: str, dome: str) -> Optional[str]:
         """
         Get plant ID by scientific name and dome.
+        Served from the ids of already loaded plant rows (e.g. by get_plants_by_dome
+        when the game picked the plant), so uploads usually skip the database query.
         
         Args:
             scientific_name: Scientific name of the plant
@@ -52,16 +167,30 @@ class SupabaseHandler:
         Returns:
             Plant ID (UUID) or None if not found
         """
-        return self.plant_service.get_plant_id_by_scientific_name_and_dome(scientific_name, dome)
+        key = (scientific_name, dome)
+        cached = self._plant_ids.get(key)
+        if self._is_fresh(cached):
+            return cached[1]
+        cached = self._plant_id_cache.get(key)
+        if not self._is_fresh(cached):
+            generation = self._generation
+            plant_id = self.plant_service.get_plant_id_by_scientific_name_and_dome(scientific_name, dome)
+            if plant_id is None:
+                return None
+            cached = (time.monotonic(), plant_id)
+            with self._lock:
+                if generation == self._generation:
+                    self._plant_id_cache[key] = cached
+        return cached[1]
 
     # USER_PLANT_IMAGES TABLE - USED FOR ADDING AND GETTING ALL USER PLANT IMAGES
 
-    def upload_user_plant_image(self, scientific_name: str, dome: str, image: bytes, health_assessment: Optional[Dict] = None) -> Dict:
+    def upload_user_plant_image(self, scientific_name: str, dome: str, image: bytes, health_assessment: Optional[Dict] = None, plant_id: Optional[str] = None) -> Dict:
         """
         Upload a user's plant image to Supabase storage and save the record to the database.
         
         Steps:
-        1. Get the plant_id from scientific_name and dome
+        1. Get the plant_id from scientific_name and dome (skipped if plant_id is given)
         2. Upload image to Supabase storage bucket "plant-images"
         3. Save the image URL and health assessment to user_plant_images table
         
@@ -70,12 +199,14 @@ class SupabaseHandler:
             dome: Dome name where the plant is located
             image: Image bytes to upload
             health_assessment: Optional health assessment dictionary from PlantHealthAssessor
+            plant_id: Optional plant ID if the caller already looked it up
             
         Returns:
             Dictionary with success status and image data or error message
         """
         # Step 1: Get plant_id from scientific_name and dome
-        plant_id = self.get_plant_id_by_scientific_name_and_dome(scientific_name, dome)
+        if not plant_id:
+            plant_id = self.get_plant_id_by_scientific_name_and_dome(scientific_name, dome)
         if not plant_id:
             return {
                 "success": False,
@@ -84,3 +215,79 @@ class SupabaseHandler:
         
         # Step 2 & 3: Upload image and save to database (handled by image_service)
         return self.image_service.upload_user_plant_image(plant_id, image, health_assessment)
+
+    def decode_plant_image(self, image: bytes):
+        """
+        Decode an image once so it can be shared by the classifier and compress_plant_image.
+        
+        Args:
+            image: Image bytes
+            
+        Returns:
+            Upright RGB PIL image, downscaled while decoding if it is very large
+            
+        Raises:
+            Exception: If the image cannot be decoded
+        """
+        return self.image_service.decode_image(image)
+
+    def compress_plant_image(self, image: bytes, decoded=None) -> bytes:
+        """
+        Downscale and recompress a large image for upload (small images are returned as is).
+        Lets callers prepare the upload while the image is still being classified.
+        
+        Args:
+            image: Image bytes
+            decoded: Optional image from decode_plant_image, so the bytes are not decoded again
+            
+        Returns:
+            Image bytes to pass to upload_plant_image_file with compressed=True
+        """
+        return self.image_service.compress_image(image, decoded)
+
+    def upload_plant_image_file(self, plant_id: str, image: bytes, compressed: bool = False) -> str:
+        """
+        Upload an image to Supabase storage without saving a database record.
+        Lets callers start the upload before the health assessment is ready.
+        
+        Args:
+            plant_id: Plant ID (UUID)
+            image: Image bytes to upload
+            compressed: True if the image already went through compress_plant_image
+            
+        Returns:
+            Path of the uploaded image in the storage bucket
+            
+        Raises:
+            Exception: If the upload fails
+        """
+        return self.image_service.upload_image_file(plant_id, image, compressed)
+
+    def save_user_plant_image(self, plant_id: str, path: str, health_assessment: Optional[Dict] = None) -> Dict:
+        """
+        Save an image uploaded with upload_plant_image_file to the user_plant_images table.
+        
+        Args:
+            plant_id: Plant ID (UUID)
+            path: Storage path returned by upload_plant_image_file
+            health_assessment: Optional health assessment dictionary from PlantHealthAssessor
+            
+        Returns:
+            Dictionary with success status and image data (image_url, thumbnail_url) or error message
+        """
+        return self.image_service.save_user_plant_image(plant_id, path, health_assessment)
+
+_supabase_handler = None
+_supabase_handler_lock = threading.Lock()
+
+def get_supabase_handler() -> SupabaseHandler:
+    """
+    Get the shared SupabaseHandler instance.
+    Creation is locked so concurrent first requests (run in worker threads) create only one.
+    """
+    global _supabase_handler
+    if _supabase_handler is None:
+        with _supabase_handler_lock:
+            if _supabase_handler is None:
+                _supabase_handler = SupabaseHandler()
+    return _supabase_handler
@@ -0,0 +1,14 @@
+"""
+Shared helpers for the pooled httpx clients (Supabase, OpenAI).
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def http2_available() -> bool:
+    """True if the h2 package is installed, so httpx transports can use HTTP/2."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
@@ -1,9 +1,16 @@
+import asyncio
+import logging
 import os
+import anyio.to_thread
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api import routes as game_routes
-from game_utils.plant_classifier import PlantClassifier
-from game_utils.plant_health_assesor import get_plant_health_assessor
+from game_utils.plant_summarizer import close_plant_summarizer, get_plant_summarizer
+from game_utils.response_cache import close_response_cache
+from game_utils.supabase_handler import get_supabase_handler
+from plant_game import get_plant_classifier
+from settings import get_settings
 from dotenv import load_dotenv
 
 import uvicorn
@@ -11,34 +18,13 @@ import uvicorn
 # Load environment variables
 load_dotenv()
 
+# Request-path messages are logged at DEBUG, so at the default INFO level they cost no formatting or writes
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
 # Validate required environment variables on startup
 def validate_environment_variables():
     """Validate that all required environment variables are set."""
-    required_vars = {
-        "SUPABASE_URL": os.getenv("SUPABASE_URL"),
-        "SUPABASE_SECRET_KEY": os.getenv("SUPABASE_SECRET_KEY"),
-        "SUPABASE_PUBLISHABLE_KEY": os.getenv("SUPABASE_PUBLISHABLE_KEY"),
-        "TAVILY_API_KEY": os.getenv("TAVILY_API_KEY"),
-        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
-    }
-    
-    missing_vars = []
-    
-    # Check SUPABASE_URL (required)
-    if not required_vars["SUPABASE_URL"]:
-        missing_vars.append("SUPABASE_URL")
-    
-    # Check Supabase keys (at least one is required)
-    if not required_vars["SUPABASE_SECRET_KEY"] and not required_vars["SUPABASE_PUBLISHABLE_KEY"]:
-        missing_vars.append("SUPABASE_SECRET_KEY or SUPABASE_PUBLISHABLE_KEY")
-    
-    # Check TAVILY_API_KEY (required)
-    if not required_vars["TAVILY_API_KEY"]:
-        missing_vars.append("TAVILY_API_KEY")
-    
-    # Check OPENAI_API_KEY (required)
-    if not required_vars["OPENAI_API_KEY"]:
-        missing_vars.append("OPENAI_API_KEY")
+    missing_vars = get_settings().missing()
     
     if missing_vars:
         error_message = (
@@ -79,18 +65,58 @@ async def startup_event():
         print(f"✗ Environment validation failed: {e}")
         raise
     
+    # Blocking I/O (database and storage calls) runs in worker threads; size both
+    # asyncio's default executor and Starlette's threadpool so many requests can overlap
+    thread_pool_size = int(os.getenv("THREAD_POOL_SIZE", "100"))
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=thread_pool_size, thread_name_prefix="worker")
+    )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = thread_pool_size
+    
     # Load BioCLIP model and plant database
-    print("Loading BioCLIP model and plant database...")
-    # This triggers the model loading and caching
-    # The first instance loads everything, subsequent instances use the cache
-    classifier = PlantClassifier()
+    # With PRELOAD_MODEL=0 the model is loaded by the first image submission instead
+    if os.getenv("PRELOAD_MODEL", "1") == "1":
+        print("Loading BioCLIP model and plant database...")
+        # This creates the shared classifier that PlantGame uses, loading and caching the model
+        classifier = get_plant_classifier()
+        
+        # Load health assessor (will share model with classifier if already loaded)
+        print("Loading plant health assessor...")
+        from game_utils.plant_health_assesor import get_plant_health_assessor
+        health_assessor = get_plant_health_assessor()
+    else:
+        print("Skipping BioCLIP preload (PRELOAD_MODEL=0)")
+    
+    # Create the shared database handler and summarizer so the first request doesn't pay for it
+    print("Initializing database handler and plant summarizer...")
+    supabase_handler = get_supabase_handler()
+    plant_summarizer = get_plant_summarizer()
     
-    # Load health assessor (will share model with classifier if already loaded)
-    print("Loading plant health assessor...")
-    health_assessor = get_plant_health_assessor()
+    # Open the Supabase, OpenAI and Tavily connections now so the first request finds them warm
+    try:
+        await asyncio.to_thread(supabase_handler.warm_up)
+    except Exception as e:
+        print(f"Could not warm up Supabase connection: {e}")
+    await plant_summarizer.warm_up()
+    
+    # Optionally warm the summary cache for every plant in the background
+    if os.getenv("PRECOMPUTE_SUMMARIES", "0") == "1":
+        plants = sorted(set(supabase_handler.get_all_scientific_names()))
+        print(f"Precomputing summaries for {len(plants)} plants in the background...")
+        app.state.precompute_task = asyncio.create_task(plant_summarizer.precompute_summaries(plants))
     
     print("Application startup complete!")
 
+# Shutdown event - Close pooled HTTP connections
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop summary precomputation, close the plant summarizer's HTTP connections and the response cache on shutdown"""
+    precompute_task = getattr(app.state, "precompute_task", None)
+    if precompute_task is not None:
+        precompute_task.cancel()
+    await close_plant_summarizer()
+    close_response_cache()
+
 # Include routers
 app.include_router(game_routes.router)
 
@@ -100,4 +126,8 @@ async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="localhost", port=8003)
\ No newline at end of file
+    # uvicorn picks up uvloop and httptools when they are installed (uvicorn[standard]).
+    # Keep idle client connections open for 75s instead of the default 5s so clients and
+    # proxies can reuse them between requests.
+    # One worker process: each worker would load its own copy of BioCLIP and its own caches.
+    uvicorn.run(app, host="localhost", port=8003, timeout_keep_alive=75)
@@ -1,18 +1,49 @@
+import asyncio
+import logging
+import os
 import random
-import traceback
-from game_utils.supabase_handler import SupabaseHandler
-from game_utils.plant_summarizer import PlantSummarizer
-from game_utils.plant_classifier import PlantClassifier
-from game_utils.plant_health_assesor import get_plant_health_assessor
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from game_utils.supabase_handler import get_supabase_handler
+from game_utils.plant_summarizer import get_plant_summarizer
+
+# The classifier and health assessor modules import torch and open_clip, which takes
+# seconds; they are imported on first use so starting the app (e.g. with PRELOAD_MODEL=0)
+# and importing this module stay fast
+if TYPE_CHECKING:
+    from game_utils.plant_classifier import PlantClassifier
+
+logger = logging.getLogger(__name__)
 
 
 _plant_classifier = None
+_plant_classifier_lock = threading.Lock()
+
+# CPU-bound image work (decoding, classification, health assessment, compression) runs on
+# its own pool, sized to the CPU count, so it cannot starve the database and storage calls
+# that run on the default executor
+_classifier_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CLASSIFIER_THREAD_POOL_SIZE", "0")) or os.cpu_count() or 4,
+    thread_name_prefix="classifier"
+)
+
+
+async def _run_cpu_bound(func, *args):
+    """Run a CPU-bound call on the classifier thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(_classifier_executor, func, *args)
 
 def get_plant_classifier():
-    """Get the shared PlantClassifier instance"""
+    """
+    Get the shared PlantClassifier instance.
+    Creation is locked so concurrent first requests (run in worker threads) load the model only once.
+    """
     global _plant_classifier
     if _plant_classifier is None:
-        _plant_classifier = PlantClassifier()
+        with _plant_classifier_lock:
+            if _plant_classifier is None:
+                from game_utils.plant_classifier import PlantClassifier
+                _plant_classifier = PlantClassifier()
     return _plant_classifier
 
 
@@ -25,9 +56,14 @@ class PlantGame:
         self.dome_type = dome_type
         self.current_plant = plant_name
 
-        self.supabase_handler = None # used to get the plants from the database and upload user images
-        self.plant_classifier = None # used to classify the user's image 
-        self.plant_summarizer = None # used to summarize the plant
+        self.supabase_handler = get_supabase_handler() # used to get the plants from the database and upload user images
+        self.plant_summarizer = get_plant_summarizer() # used to summarize the plant
+        self._dome_plants = None # plants in the dome, loaded on first use
+
+    @property
+    def plant_classifier(self) -> "PlantClassifier":
+        """The shared classifier used to classify the user's image (created on first use)."""
+        return get_plant_classifier()
 
 
     def get_random_plant(self) -> str:
@@ -39,47 +75,58 @@ class PlantGame:
 
         Return the random plant name to the user.
         """
-        self.supabase_handler = SupabaseHandler()
         dome_plants = self._load_plants_in_dome()
         self.current_plant = random.choice(dome_plants)
-        print(f"Random plant: {self.current_plant}")
+        logger.debug("Random plant: %s", self.current_plant)
         self.current_plant = "Adiantum peruvianum"
         return self.current_plant
 
-    def _load_plants_in_dome(self) -> list[str]:
+    def _load_plants_in_dome(self) -> tuple[str, ...]:
         """
         Load the plants from the database that are in the dome type.
+        Loaded once per game; the handler also caches them across games.
         """
-        all_plants = self.supabase_handler.get_all_plants_by_scientific_name()
-
-        dome_plants = [plant["scientific_name"] for plant in all_plants if plant.get("dome") == self.dome_type]
-        return dome_plants
+        if self._dome_plants is None:
+            self._dome_plants = self.supabase_handler.get_plants_by_dome(self.dome_type)
+        return self._dome_plants
 
 
-    def verify_and_upload_image(self, image: bytes) -> dict:
+    async def verify_and_upload_image(self, image: bytes) -> dict:
         """
         Verify an image by classifying it and checking if it matches the target plant.
         Only uploads the image to the database if the classification matches the target plant.
         
+        The image is decoded once and the decoded image is shared by the classification
+        and the compression for upload. The plant_id lookup and the compression are
+        independent of the classification, so they run concurrently with it; likewise
+        the image is uploaded to storage while its health is assessed. Blocking work runs in
+        worker threads so the event loop stays free (CPU-bound image work on its own pool).
+        
         Args:
             image: The image bytes to classify and potentially upload
             
         Returns:
             dict: Contains success status, message, classified_plant, confidence, and target_plant.
-                  On successful upload, also includes image_url.
+                  On successful upload, also includes image_url and thumbnail_url.
         """
         try:
             # Log the target plant at the start
-            print(f"Classifying image for target plant: {self.current_plant}")
+            logger.debug("Classifying image for target plant: %s", self.current_plant)
             
-            # Step 1: Classify the image
-            plant_classifier = get_plant_classifier()
-            result = plant_classifier.classify_image(image)
+            # Step 1: Decode the image while the plant_id for the upload is looked up, then
+            # classify the decoded image while it is compressed for upload
+            decode_task = _run_cpu_bound(self._decode_image, image)
+            plant_id_task = asyncio.ensure_future(asyncio.to_thread(self._prefetch_plant_id))
+            decoded = await decode_task
+            (result, image_features), upload_image = await asyncio.gather(
+                _run_cpu_bound(self._classify_image, decoded if decoded is not None else image),
+                _run_cpu_bound(self._compress_for_upload, image, decoded)
+            )
+            plant_id = await plant_id_task
             
-            if not result.get("success"):
-                error_msg = result.get("error", "Unknown classification error")
-                print(f"Classification failed: {error_msg}")
-                print("Upload skipped")
+            if not result.success:
+                logger.warning("Classification failed")
+                logger.debug("Upload skipped")
                 return {
                     "success": False,
                     "message": "Failed to classify image. Please try again with a clearer photo.",
@@ -89,16 +136,28 @@ class PlantGame:
                 }
             
             # Extract classification details
-            classified_plant = result.get("plant_name")
-            confidence = result.get("confidence", 0.0)
+            classified_plant = result.plant_name
+            confidence = result.confidence
             
             # Log classification result
-            print(f"Classification result: {classified_plant} (confidence: {confidence:.2%})")
+            logger.debug("Classification result: %s (confidence: %.2f%%)", classified_plant, confidence * 100)
             
             # Step 2: Check if classification matches target plant
+            # Unclear images are rejected instead of being compared with the target plant
+            if confidence < self.plant_classifier.min_confidence:
+                logger.debug("Match status: LOW CONFIDENCE")
+                logger.debug("Upload skipped")
+                return {
+                    "success": False,
+                    "message": "Could not identify the plant with enough confidence. Please retake the photo with the plant clearly in view.",
+                    "classified_plant": classified_plant,
+                    "confidence": confidence,
+                    "target_plant": self.current_plant
+                }
+            
             if classified_plant != self.current_plant:
-                print("Match status: MISMATCH")
-                print("Upload skipped")
+                logger.debug("Match status: MISMATCH")
+                logger.debug("Upload skipped")
                 return {
                     "success": False,
                     "message": f"The image appears to be {classified_plant} (confidence: {confidence:.1%}), but you're looking for {self.current_plant}. Try again!",
@@ -107,46 +166,44 @@ class PlantGame:
                     "target_plant": self.current_plant
                 }
             
-            # Step 3: Assess plant health after match is confirmed
-            print("Match status: SUCCESS")
-            print("Assessing plant health...")
-            
-            health_assessment = None
-            try:
-                health_assessor = get_plant_health_assessor()
-                health_assessment = health_assessor.assess_plant_health(
-                    image=image,
-                    plant_name=self.current_plant,
-                    location=self.dome_type
+            # Step 3: Assess plant health after match is confirmed, uploading the image
+            # to storage at the same time (the upload doesn't depend on the assessment)
+            logger.debug("Match status: SUCCESS")
+            if not plant_id:
+                plant_id = await asyncio.to_thread(
+                    self.supabase_handler.get_plant_id_by_scientific_name_and_dome,
+                    self.current_plant, self.dome_type
+                )
+            if not plant_id:
+                upload_result = {
+                    "success": False,
+                    "error": f"Plant '{self.current_plant}' not found in dome '{self.dome_type}'"
+                }
+            else:
+                logger.debug("Assessing plant health...")
+                logger.debug("Upload initiated")
+                health_assessment, file_upload = await asyncio.gather(
+                    _run_cpu_bound(self._assess_health, image, image_features),
+                    asyncio.to_thread(self._upload_image_file, plant_id, image, upload_image)
                 )
                 
-                if health_assessment.get("success"):
-                    print(f"Health assessment completed: {health_assessment.get('overall_status')} (score: {health_assessment.get('health_score')}/100)")
+                # Step 4: Save the image record with health assessment data
+                if file_upload.get("success"):
+                    upload_result = await asyncio.to_thread(
+                        self.supabase_handler.save_user_plant_image,
+                        plant_id,
+                        file_upload["path"],
+                        health_assessment.to_dict() if health_assessment else None
+                    )
                 else:
-                    print(f"Health assessment failed: {health_assessment.get('error', 'Unknown error')}")
-                    # Continue with upload even if health assessment fails
-            except Exception as e:
-                print(f"Error during health assessment: {str(e)}")
-                # Continue with upload even if health assessment fails
-                health_assessment = None
-            
-            # Step 4: Upload image with health assessment data
-            print("Upload initiated")
-            
-            self.supabase_handler = SupabaseHandler()
-            upload_result = self.supabase_handler.upload_user_plant_image(
-                scientific_name=self.current_plant,
-                dome=self.dome_type,
-                image=image,
-                health_assessment=health_assessment
-            )
+                    upload_result = file_upload
             
             # Log the upload result for debugging
-            print(f"Upload result: {upload_result}")
+            logger.debug("Upload result: %s", upload_result)
             
             if not upload_result.get("success"):
                 error_msg = upload_result.get('error', 'Unknown error')
-                print(f"Upload failed: {error_msg}")
+                logger.error("Upload failed: %s", error_msg)
                 return {
                     "success": False,
                     "message": f"Image matched but upload failed: {error_msg}",
@@ -162,23 +219,23 @@ class PlantGame:
                 "classified_plant": classified_plant,
                 "confidence": confidence,
                 "target_plant": self.current_plant,
-                "image_url": upload_result.get("image_url")
+                "image_url": upload_result.get("image_url"),
+                "thumbnail_url": upload_result.get("thumbnail_url")
             }
             
             # Include health assessment in response if available
-            if health_assessment and health_assessment.get("success"):
+            if health_assessment and health_assessment.success:
                 response["health_assessment"] = {
-                    "status": health_assessment.get("overall_status"),
-                    "score": health_assessment.get("health_score"),
-                    "confidence": health_assessment.get("confidence")
+                    "status": health_assessment.overall_status,
+                    "score": health_assessment.health_score,
+                    "confidence": health_assessment.confidence
                 }
             
             return response
             
         except Exception as e:
             # Log full error details including traceback
-            print(f"Exception during verification: {str(e)}")
-            print(f"Full traceback:\n{traceback.format_exc()}")
+            logger.exception("Exception during verification: %s", e)
             return {
                 "success": False,
                 "message": f"Error verifying image: {str(e)}",
@@ -187,13 +244,107 @@ class PlantGame:
                 "target_plant": self.current_plant
             }
 
+    def _decode_image(self, image: bytes):
+        """
+        Decode the image for the classifier and the upload compression.
+        Returns None if decoding failed; each step then works from the bytes.
+        """
+        try:
+            return self.supabase_handler.decode_plant_image(image)
+        except Exception as e:
+            logger.error("Error decoding image: %s", e)
+            return None
+
+    def _classify_image(self, image):
+        """
+        Encode and classify an image (bytes or the decoded PIL image).
+        Encodes once; the classifier and the health assessor share the features.
+        
+        Returns:
+            (ClassificationResult, image features or None if encoding failed)
+        """
+        plant_classifier = self.plant_classifier
+        try:
+            image_features = plant_classifier.encode_image(image)
+        except Exception as e:
+            logger.error("Error encoding image: %s", e)
+            image_features = None
+        return plant_classifier.classify_image(image, image_features=image_features), image_features
+
+    def _prefetch_plant_id(self):
+        """
+        Look up the current plant's id for the upload.
+        Errors are only logged and None is returned; the lookup is retried after a match.
+        """
+        try:
+            return self.supabase_handler.get_plant_id_by_scientific_name_and_dome(self.current_plant, self.dome_type)
+        except Exception as e:
+            logger.error("Error looking up plant id: %s", e)
+            return None
+
+    def _compress_for_upload(self, image: bytes, decoded=None):
+        """
+        Compress the image for upload, reusing the decoded image if there is one.
+        Returns None if compression failed; the upload then compresses the original itself.
+        """
+        try:
+            return self.supabase_handler.compress_plant_image(image, decoded)
+        except Exception as e:
+            logger.error("Error compressing image: %s", e)
+            return None
+
+    def _upload_image_file(self, plant_id: str, image: bytes, upload_image: bytes = None) -> dict:
+        """
+        Upload the image to storage, using the precompressed upload_image if there is one.
+        Returns a dict with success and the storage path, or success False and the error.
+        """
+        try:
+            if upload_image is not None:
+                path = self.supabase_handler.upload_plant_image_file(plant_id, upload_image, compressed=True)
+            else:
+                path = self.supabase_handler.upload_plant_image_file(plant_id, image)
+            return {
+                "success": True,
+                "path": path
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error uploading image: {str(e)}"
+            }
+
+    def _assess_health(self, image: bytes, image_features):
+        """
+        Assess the health of the current plant from the image.
+        Returns None if the assessment raised; the upload continues either way.
+        """
+        try:
+            from game_utils.plant_health_assesor import get_plant_health_assessor
+            health_assessor = get_plant_health_assessor()
+            health_assessment = health_assessor.assess_plant_health(
+                image=image,
+                plant_name=self.current_plant,
+                location=self.dome_type,
+                image_features=image_features
+            )
+            
+            if health_assessment.success:
+                logger.debug("Health assessment completed: %s (score: %s/100)", health_assessment.overall_status, health_assessment.health_score)
+            else:
+                logger.warning("Health assessment failed: %s", health_assessment.error)
+                # Continue with upload even if health assessment fails
+            return health_assessment
+        except Exception as e:
+            logger.error("Error during health assessment: %s", e)
+            # Continue with upload even if health assessment fails
+            return None
+
 
-    def summarize_plant(self):
+    async def summarize_plant(self):
         """
         Summarize a plant based on its name.
         If no plant_name is provided, use the current plant.
         """
-        self.plant_summarizer = PlantSummarizer()
         # Use current plant if no plant name provided
         target_plant = self.current_plant
         
@@ -203,9 +354,9 @@ class PlantGame:
                 "error": "No plant to summarize"
             }
         
-        print(f"Summarizing plant: {target_plant}")
-        summary = self.plant_summarizer.summarize(target_plant)
-        print(f"Summary: {summary}")
+        logger.debug("Summarizing plant: %s", target_plant)
+        summary = await self.plant_summarizer.summarize(target_plant)
+        logger.debug("Summary: %s", summary)
         
         return {
             "plant_name": target_plant,
@@ -213,7 +364,31 @@ class PlantGame:
             "success": True
         }
 
-    def answer_plant_question(self, question):
+    async def summarize_plant_stream(self):
+        """
+        Stream a summary of the current plant as text chunks.
+        Raises ValueError if there is no current plant.
+        """
+        if not self.current_plant:
+            raise ValueError("No plant to summarize")
+        
+        logger.debug("Streaming summary of plant: %s", self.current_plant)
+        async for chunk in self.plant_summarizer.summarize_stream(self.current_plant):
+            yield chunk
+
+    async def answer_plant_question_stream(self, question):
+        """
+        Stream the answer to a question about the current plant as text chunks.
+        Raises ValueError if there is no current plant.
+        """
+        if not self.current_plant:
+            raise ValueError("No current plant to ask about")
+        
+        logger.debug("Streaming answer about %s: %s", self.current_plant, question)
+        async for chunk in self.plant_summarizer.follow_up_stream(self.current_plant, question):
+            yield chunk
+
+    async def answer_plant_question(self, question):
         """
         Answer a question about the current plant.
         """
@@ -223,12 +398,8 @@ class PlantGame:
                 "error": "No current plant to ask about"
             }
         
-        # Initialize plant_summarizer if not already initialized
-        if self.plant_summarizer is None:
-            self.plant_summarizer = PlantSummarizer()
-        
-        print(f"Answering question about {self.current_plant}: {question}")
-        answer = self.plant_summarizer.follow_up_question(self.current_plant, question)
+        logger.debug("Answering question about %s: %s", self.current_plant, question)
+        answer = await self.plant_summarizer.follow_up_question(self.current_plant, question)
         
         return {
             "plant_name": self.current_plant,
@@ -236,3 +407,23 @@ class PlantGame:
             "answer": answer,
             "success": True
         }
+
+    async def answer_plant_questions(self, questions):
+        """
+        Answer several questions about the current plant with one OpenAI request.
+        """
+        if not self.current_plant:
+            return {
+                "success": False,
+                "error": "No current plant to ask about"
+            }
+        
+        logger.debug("Answering %s questions about %s", len(questions), self.current_plant)
+        answers = await self.plant_summarizer.follow_up_questions(self.current_plant, questions)
+        
+        return {
+            "plant_name": self.current_plant,
+            "questions": questions,
+            "answers": answers,
+            "success": True
+        }
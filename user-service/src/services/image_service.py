@@ -2,8 +2,13 @@
 Image service for managing plant images in Supabase storage and database.
 Handles image uploads to storage and database operations for user_plant_images table.
 """
-import uuid
+import hashlib
+import io
+import time
+import httpx
 from typing import Dict, Optional
+from PIL import Image, ImageOps
+from storage3.exceptions import StorageApiError
 from supabase_client import get_client
 
 
@@ -16,6 +21,56 @@ class ImageService:
         self.table = "user_plant_images"
         self.storage_bucket = "plant-images"
     
+    # Images larger than COMPRESS_MIN_BYTES are downscaled to fit within
+    # MAX_UPLOAD_DIMENSION pixels and re-encoded as JPEG before upload
+    COMPRESS_MIN_BYTES = 300_000
+    MAX_UPLOAD_DIMENSION = 1200
+    UPLOAD_JPEG_QUALITY = 85
+    
+    # Supabase Storage image transformation for thumbnail URLs; the resized image is
+    # generated on request and cached by the CDN (WebP for browsers that accept it)
+    THUMBNAIL_TRANSFORM = {"width": 300, "height": 300, "resize": "cover", "quality": 75}
+    
+    # Storage uploads failing with a network error, 429 or 5xx are retried
+    # UPLOAD_RETRIES times with exponential backoff starting at UPLOAD_BACKOFF seconds
+    UPLOAD_RETRIES = 3
+    UPLOAD_BACKOFF = 0.5
+    
+    def decode_image(self, image: bytes) -> Image.Image:
+        """
+        Decode image bytes into an upright RGB image that the classifier and
+        compress_image can reuse. The image is decoded at full resolution, so the
+        classifier gets the same pixels as from the bytes (scripts/eval_decoded_input.py).
+        
+        Raises:
+            Exception: If the image cannot be decoded
+        """
+        with Image.open(io.BytesIO(image)) as img:
+            # Apply the EXIF orientation, since re-encoding drops the EXIF data
+            return ImageOps.exif_transpose(img).convert("RGB")
+    
+    def compress_image(self, image: bytes, decoded: Optional[Image.Image] = None) -> bytes:
+        """
+        Downscale and re-encode a large image as JPEG to cut upload size.
+        Returns the original bytes if the image is small, cannot be decoded,
+        or does not get smaller.
+        
+        Args:
+            image: Image bytes
+            decoded: The image already decoded by decode_image (left unchanged), to skip decoding again
+        """
+        if len(image) <= self.COMPRESS_MIN_BYTES:
+            return image
+        try:
+            img = decoded.copy() if decoded is not None else self.decode_image(image)
+            img.thumbnail((self.MAX_UPLOAD_DIMENSION, self.MAX_UPLOAD_DIMENSION))
+            buffer = io.BytesIO()
+            img.save(buffer, "JPEG", quality=self.UPLOAD_JPEG_QUALITY, optimize=True)
+        except Exception:
+            return image
+        compressed = buffer.getvalue()
+        return compressed if len(compressed) < len(image) else image
+    
     def upload_user_plant_image(self, plant_id: str, image: bytes, health_assessment: Optional[Dict] = None) -> Dict:
         """
         Upload a user's plant image to Supabase storage and save the record to the database.
@@ -35,47 +90,146 @@ class ImageService:
         """
         try:
             # Step 1: Upload image to Supabase storage bucket
-            # Generate a unique filename
-            file_extension = "jpg"  # Default to jpg, could be determined from image bytes
-            filename = f"{plant_id}/{uuid.uuid4()}.{file_extension}"
-            
-            # Upload to storage bucket
-            storage_response = self.client.storage.from_(self.storage_bucket).upload(
-                path=filename,
-                file=image,
-                file_options={"content-type": "image/jpeg", "upsert": "false"}
-            )
-            
-            # Step 2: Get the public URL for the uploaded image
-            image_url = self.client.storage.from_(self.storage_bucket).get_public_url(filename)
-            
-            # Step 3: Prepare image record with health assessment data
-            image_record = {
-                "plant_id": plant_id,
-                "image_url": image_url
+            path = self.upload_image_file(plant_id, image)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error uploading image: {str(e)}"
             }
+        
+        # Step 2 & 3: Get the public URL and save it with the health assessment to the database
+        return self.save_user_plant_image(plant_id, path, health_assessment)
+    
+    def upload_image_file(self, plant_id: str, image: bytes, compressed: bool = False) -> str:
+        """
+        Upload an image to the Supabase storage bucket "plant-images".
+        Large images are downscaled and recompressed first (see compress_image).
+        
+        Args:
+            plant_id: UUID of the plant (used as the folder in the bucket)
+            image: Image bytes to upload
+            compressed: True if the image already went through compress_image
             
-            # Add health assessment data if provided
-            if health_assessment and health_assessment.get("success"):
-                image_record["health_status"] = health_assessment.get("overall_status", "unknown")
-                image_record["health_score"] = health_assessment.get("health_score", 0)
-                image_record["health_confidence"] = health_assessment.get("confidence", 0.0)
-                # Store full assessment as JSONB
-                image_record["health_assessment"] = health_assessment
+        Returns:
+            Path of the uploaded image in the bucket
             
-            db_response = self.client.table(self.table).insert(image_record).execute()
+        Raises:
+            Exception: If the upload fails
+        """
+        if not compressed:
+            image = self.compress_image(image)
+        
+        # Name the file by its content hash, so a resubmitted image maps to the same file
+        file_extension = "jpg"  # Default to jpg, could be determined from image bytes
+        digest = hashlib.blake2b(image, digest_size=16).hexdigest()
+        filename = f"{plant_id}/{digest}.{file_extension}"
+        
+        # Skip the storage write if a saved image already points at this file
+        if self._is_image_saved(plant_id, filename):
+            return filename
+        
+        # Upload to storage bucket
+        self._upload_with_retries(filename, image)
+        return filename
+    
+    def _is_image_saved(self, plant_id: str, path: str) -> bool:
+        """Check whether a user_plant_images row of the plant references the file at path."""
+        # The public URL is built locally from the path, so rows can be matched exactly
+        image_url = self.client.storage.from_(self.storage_bucket).get_public_url(path)
+        response = (
+            self.client.table(self.table)
+            .select("id")
+            .eq("plant_id", plant_id)
+            .eq("image_url", image_url)
+            .limit(1)
+            .execute()
+        )
+        return bool(response.data)
+    
+    def _upload_with_retries(self, filename: str, image: bytes):
+        """Upload bytes to the storage bucket, retrying transient failures with exponential backoff."""
+        bucket = self.client.storage.from_(self.storage_bucket)
+        for attempt in range(self.UPLOAD_RETRIES + 1):
+            try:
+                bucket.upload(
+                    path=filename,
+                    file=image,
+                    file_options={"content-type": "image/jpeg", "upsert": "false"}
+                )
+                return
+            except StorageApiError as e:
+                status = int(e.status) if str(e.status).isdigit() else 0
+                # The filename is the content hash, so a conflict means the same image is already
+                # stored (by an earlier attempt or an earlier submission)
+                if status == 409:
+                    return
+                if (status != 429 and status < 500) or attempt == self.UPLOAD_RETRIES:
+                    raise
+            except httpx.TransportError:
+                if attempt == self.UPLOAD_RETRIES:
+                    raise
+            time.sleep(self.UPLOAD_BACKOFF * (2 ** attempt))
+    
+    def save_user_plant_image(self, plant_id: str, path: str, health_assessment: Optional[Dict] = None) -> Dict:
+        """
+        Save an uploaded image's URL and health assessment to the user_plant_images table.
+        
+        Args:
+            plant_id: UUID of the plant
+            path: Path of the uploaded image in the bucket (from upload_image_file)
+            health_assessment: Optional health assessment dictionary from PlantHealthAssessor
             
-            return {
-                "success": True,
-                "image_id": db_response.data[0]["id"] if db_response.data else None,
-                "image_url": image_url,
-                "plant_id": plant_id,
-                "health_assessed": health_assessment is not None and health_assessment.get("success", False)
-            }
+        Returns:
+            Dictionary with success status and image data or error message.
+            On success it includes image_url (original) and thumbnail_url (resized by Supabase Storage).
+        """
+        try:
+            image_record, thumbnail_url = self._build_image_record(plant_id, path, health_assessment)
+            db_response = self.client.table(self.table).insert(image_record).execute()
+            return self._saved_result(image_record, thumbnail_url, db_response.data[0]["id"] if db_response.data else None)
             
         except Exception as e:
+            # The uploaded file is left in place: it is named by its content hash, so
+            # another submission of the same image may already reference it or reuse it
             return {
                 "success": False,
                 "error": f"Error uploading image: {str(e)}"
             }
-
+    
+    def _build_image_record(self, plant_id: str, path: str, health_assessment: Optional[Dict]):
+        """
+        Build the user_plant_images row for an uploaded image.
+        
+        Returns:
+            (record dict, thumbnail URL)
+        """
+        # Get the public URLs for the uploaded image (built locally, no request)
+        bucket = self.client.storage.from_(self.storage_bucket)
+        image_url = bucket.get_public_url(path)
+        thumbnail_url = bucket.get_public_url(path, {"transform": self.THUMBNAIL_TRANSFORM})
+        
+        # Prepare image record with health assessment data
+        image_record = {
+            "plant_id": plant_id,
+            "image_url": image_url
+        }
+        
+        # Add health assessment data if provided
+        if health_assessment and health_assessment.get("success"):
+            image_record["health_status"] = health_assessment.get("overall_status", "unknown")
+            image_record["health_score"] = health_assessment.get("health_score", 0)
+            image_record["health_confidence"] = health_assessment.get("confidence", 0.0)
+            # Store full assessment as JSONB
+            image_record["health_assessment"] = health_assessment
+        return image_record, thumbnail_url
+    
+    def _saved_result(self, image_record: Dict, thumbnail_url: str, image_id: Optional[str]) -> Dict:
+        """Build the success result for a saved image record."""
+        return {
+            "success": True,
+            "image_id": image_id,
+            "image_url": image_record["image_url"],
+            "thumbnail_url": thumbnail_url,
+            "plant_id": image_record["plant_id"],
+            "health_assessed": "health_status" in image_record
+        }
@@ -43,45 +43,85 @@ class PlantService:
         response = self.client.table(self.table).select("*").order("scientific_name", desc=False).execute()
         return response.data if response.data else []
     
-    def get_plant_id_by_scientific_name_and_dome(self, scientific_name: str, dome: str) -> Optional[str]:
+    def get_plants_by_dome(self, dome: str) -> List[Dict]:
         """
-        Get plant ID by scientific name and dome.
-        Tries exact match first, then case-insensitive match.
+        Get the plants in a dome, ordered by scientific name.
+        Filters on the server and selects only the id, scientific_name and dome columns.
         
         Args:
-            scientific_name: Scientific name of the plant
             dome: Dome name
             
         Returns:
-            Plant ID (UUID) or None if not found
+            List of plant dictionaries with id, scientific_name and dome
         """
-        # First try exact match
         response = (
             self.client.table(self.table)
-            .select("id, dome")
-            .eq("scientific_name", scientific_name)
+            .select("id, scientific_name, dome")
             .eq("dome", dome)
-            .limit(1)
+            .order("scientific_name", desc=False)
             .execute()
         )
+        return response.data if response.data else []
+    
+    def get_all_scientific_names(self, page_size: int = 1000) -> List[str]:
+        """
+        Get the scientific names of all plants, ordered by scientific name.
+        Selects only the name column and fetches it in pages of page_size rows.
         
-        if response.data:
-            return response.data[0]["id"]
+        Args:
+            page_size: Number of rows to fetch per request
+            
+        Returns:
+            List of scientific names
+        """
+        names = []
+        offset = 0
+        while True:
+            response = (
+                self.client.table(self.table)
+                .select("scientific_name")
+                .order("scientific_name", desc=False)
+                .order("id", desc=False)  # tie-breaker so pages are stable for duplicate names
+                .range(offset, offset + page_size - 1)
+                .execute()
+            )
+            rows = response.data or []
+            names.extend(row["scientific_name"] for row in rows)
+            if len(rows) < page_size:
+                return names
+            offset += page_size
+    
+    def get_plant_id_by_scientific_name_and_dome(self, scientific_name: str, dome: str) -> Optional[str]:
+        """
+        Get plant ID by scientific name and dome.
+        Tries exact match first, then case-insensitive match, from a single query.
         
-        # If exact match fails, try case-insensitive by getting all matches and filtering
+        Args:
+            scientific_name: Scientific name of the plant
+            dome: Dome name
+            
+        Returns:
+            Plant ID (UUID) or None if not found
+        """
+        # One query for every plant with this name (a handful of rows at most),
+        # then match the dome exactly first and case-insensitively second
         response = (
             self.client.table(self.table)
             .select("id, dome")
             .eq("scientific_name", scientific_name)
             .execute()
         )
+        plants = response.data or []
+        
+        for plant in plants:
+            if plant.get("dome") == dome:
+                return plant["id"]
         
-        if response.data:
-            # Case-insensitive match
-            dome_lower = dome.lower().strip()
-            for plant in response.data:
-                if plant.get("dome", "").lower().strip() == dome_lower:
-                    return plant["id"]
+        # Case-insensitive match
+        dome_lower = dome.lower().strip()
+        for plant in plants:
+            if (plant.get("dome") or "").lower().strip() == dome_lower:
+                return plant["id"]
         
         return None
 
@@ -0,0 +1,73 @@
+"""
+Application settings.
+Reads the required API credentials and the tunable thresholds from the environment
+(and .env) once and shares them as a frozen Settings instance, so they are validated
+in one place and services read attributes instead of looking up the environment again.
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Required credentials for Supabase, Tavily and OpenAI, and classification thresholds."""
+    supabase_url: Optional[str]
+    supabase_secret_key: Optional[str]
+    supabase_publishable_key: Optional[str]
+    tavily_api_key: Optional[str]
+    openai_api_key: Optional[str]
+    # Classifications below these confidences are rejected as unclear images. The FAISS
+    # path's confidence is a softmax over only the top-5 plants (at least 0.2 and higher
+    # than the full-catalog softmax of the dense path), so it has its own floor.
+    # Both defaults reject 1 of the 191 correct matches in data/bioclip_wikipedia_eval.csv
+    min_confidence: float = 0.25
+    min_confidence_faiss: float = 0.3
+    # Bearer token the admin service sends to admin-only endpoints; they are disabled if unset
+    admin_api_token: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Read the settings from environment variables."""
+        return cls(
+            supabase_url=os.getenv("SUPABASE_URL"),
+            supabase_secret_key=os.getenv("SUPABASE_SECRET_KEY"),
+            supabase_publishable_key=os.getenv("SUPABASE_PUBLISHABLE_KEY"),
+            tavily_api_key=os.getenv("TAVILY_API_KEY"),
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            min_confidence=float(os.getenv("MIN_CONFIDENCE", "0.25")),
+            min_confidence_faiss=float(os.getenv("MIN_CONFIDENCE_FAISS", "0.3")),
+            admin_api_token=os.getenv("ADMIN_API_TOKEN") or None,
+        )
+
+    @property
+    def supabase_key(self) -> Optional[str]:
+        """Secret key if set (bypasses RLS), otherwise the publishable key."""
+        return self.supabase_secret_key or self.supabase_publishable_key
+
+    def missing(self) -> list[str]:
+        """Names of the required environment variables that are not set."""
+        missing_vars = []
+        if not self.supabase_url:
+            missing_vars.append("SUPABASE_URL")
+        # At least one Supabase key is required
+        if not self.supabase_key:
+            missing_vars.append("SUPABASE_SECRET_KEY or SUPABASE_PUBLISHABLE_KEY")
+        if not self.tavily_api_key:
+            missing_vars.append("TAVILY_API_KEY")
+        if not self.openai_api_key:
+            missing_vars.append("OPENAI_API_KEY")
+        return missing_vars
+
+
+_settings = None
+
+def get_settings() -> Settings:
+    """Get the shared Settings instance, read from the environment on first call."""
+    global _settings
+    if _settings is None:
+        _settings = Settings.from_env()
+    return _settings
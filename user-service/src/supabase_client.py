@@ -3,15 +3,34 @@ Supabase client initialization module.
 Provides a singleton Supabase client instance for the application.
 Supports async operations using run_in_executor to avoid blocking the event loop.
 """
-import os
 import asyncio
+import httpx
 from typing import Callable, Any
 from supabase import create_client, Client
 from supabase.client import ClientOptions
 from dotenv import load_dotenv
+from settings import get_settings
+from http_clients import http2_available
 
 load_dotenv()
 
+def _create_http_client() -> httpx.Client:
+    """
+    Create the pooled HTTP client used for all Supabase requests.
+    Uses HTTP/2 when the h2 package is installed, and retries failed connection attempts.
+    admin-service/src/supabase_client.py has a copy (the services are deployed
+    separately and share no code); keep the two in sync.
+    """
+    transport = httpx.HTTPTransport(
+        http2=http2_available(),
+        retries=2,
+        # Sized for the worker threads making database and storage calls (THREAD_POOL_SIZE);
+        # idle connections are kept for a minute so bursts of requests skip the handshake
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0),
+    )
+    return httpx.Client(transport=transport, timeout=httpx.Timeout(120.0, connect=10.0))
+
+
 # Initialize Supabase client
 def get_supabase_client() -> Client:
     """
@@ -24,19 +43,23 @@ def get_supabase_client() -> Client:
     Raises:
         ValueError: If SUPABASE_URL or required key environment variables are not set
     """
-    supabase_url = os.getenv("SUPABASE_URL")
+    settings = get_settings()
+    supabase_url = settings.supabase_url
     # Try secret key first (bypasses RLS), fallback to publishable key
-    supabase_key = os.getenv("SUPABASE_SECRET_KEY") or os.getenv("SUPABASE_PUBLISHABLE_KEY")
+    supabase_key = settings.supabase_key
     
     if not supabase_url:
         raise ValueError("SUPABASE_URL environment variable is not set")
     if not supabase_key:
         raise ValueError("SUPABASE_SECRET_KEY or SUPABASE_PUBLISHABLE_KEY environment variable must be set")
     
-    # Configure client options to avoid auto-refresh and session persistence
+    # Configure client options to avoid auto-refresh and session persistence.
+    # All database and storage calls share one pooled keep-alive HTTP client so
+    # requests reuse connections instead of doing a new TCP+TLS handshake each time.
     client_options = ClientOptions(
         auto_refresh_token=False,
         persist_session=False,
+        httpx_client=_create_http_client(),
     )
     
     return create_client(supabase_url, supabase_key, options=client_options)
@@ -80,7 +103,7 @@ async def async_execute(query_builder_callable: Callable[[], Any]) -> Any:
             lambda: client.table("users").select("*").eq("id", user_id)
         )
     """
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     def _execute_in_thread():
         return query_builder_callable().execute()
     return await loop.run_in_executor(None, _execute_in_thread)